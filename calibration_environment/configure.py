@@ -21,6 +21,7 @@ CalibrationConfiguration = namedtuple(
         "loop",
         "output_csv_filepath",
         "collection_interval",
+        "equilibration_collection_interval",
         "cosmobot_hostnames",
         "cosmobot_experiment_name",
         "cosmobot_exposure_time",
@@ -114,6 +115,16 @@ def _parse_args(args: List[str]) -> Dict:
         help="time in seconds to wait between reading sensors",
     )
 
+    arg_parser.add_argument(
+        "--equilibration-collection-interval",
+        default=5,
+        type=float,
+        help=(
+            "time in seconds to wait between reading sensors while waiting for temperature and DO equilibration. "
+            "Default: 5"
+        ),
+    )
+
     calibration_arg_namespace = arg_parser.parse_args(args)
 
     cosmobot_experiment_name = calibration_arg_namespace.cosmobot_experiment_name
@@ -175,6 +186,7 @@ def get_calibration_configuration(
         loop=args["loop"],
         output_csv_filepath=_get_output_csv_filename(start_date),
         collection_interval=args["collection_interval"],
+        equilibration_collection_interval=args["equilibration_collection_interval"],
         cosmobot_experiment_name=unique_cosmobot_experiment_name,
         cosmobot_hostnames=args["cosmobot_hostnames"],
         cosmobot_exposure_time=args["cosmobot_exposure_time"],
@@ -24,6 +24,8 @@ class TestParseArgs:
             "COM3",
             "--collection-interval",
             "50",
+            "--equilibration-collection-interval",
+            "2.5",
             "--cosmobot-hostname",
             "cosmohostname1",
             "-c",
@@ -42,6 +44,7 @@ class TestParseArgs:
             "water_bath_com_port": "COM2",
             "ysi_com_port": "COM3",
             "collection_interval": 50,
+            "equilibration_collection_interval": 2.5,
             "cosmobot_experiment_name": "experiment1",
             "cosmobot_hostnames": ["cosmohostname1", "cosmohostname2"],
             "cosmobot_exposure_time": 0.5,
@@ -60,6 +63,7 @@ class TestParseArgs:
             "water_bath_com_port": "COM21",
             "ysi_com_port": "COM11",
             "collection_interval": 60,
+            "equilibration_collection_interval": 5,
             "cosmobot_hostnames": None,
             "cosmobot_experiment_name": None,
             "cosmobot_exposure_time": None,
@@ -128,6 +132,7 @@ class TestGetCalibrationConfiguration:
             loop=True,
             output_csv_filepath=sentinel.filepath,
             collection_interval=60,
+            equilibration_collection_interval=5,
             cosmobot_experiment_name=None,
             cosmobot_hostnames=None,
             cosmobot_exposure_time=None,
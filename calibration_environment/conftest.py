@@ -0,0 +1,22 @@
+import pytest
+
+from . import data_logging
+
+
+@pytest.fixture(scope="module")
+def output_directory(tmp_path_factory):
+    # Share one temporary directory across each test module rather than creating one for every test
+    return tmp_path_factory.mktemp("output")
+
+
+@pytest.fixture
+def mock_output_filepath(output_directory, request):
+    return output_directory / f"{request.node.name}.csv"
+
+
+@pytest.fixture(autouse=True)
+def close_csv_files():
+    yield
+    # Writers live in a module-level registry, so close any that this test opened rather than leaking file handles
+    for csv_filepath in list(data_logging._csv_writers_by_filepath):
+        data_logging.close_csv_file(csv_filepath)
@@ -1,7 +1,9 @@
+import csv
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from enum import Enum
-
-import pandas as pd
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, TextIO
 
 from .configure import CalibrationConfiguration
 from .drivers import gas_mixer
@@ -15,52 +17,270 @@ class EquilibrationStatus(Enum):
     DO = "waiting for do"
 
 
-def get_all_sensor_data(com_ports):
-    gas_mixer_status = gas_mixer.get_mixer_status_with_retry(
-        com_ports["gas_mixer"]
-    ).add_prefix("gas mixer ")
+_GAS_MIXER_PREFIX = "gas mixer "
+
+# Each device is on its own serial port, so the water bath and YSI are read in the background while the gas mixer
+# is read on the calling thread. Serial reads release the GIL while waiting on the device, so the total time to read
+# all sensors is roughly that of the slowest device rather than the sum of all of them.
+# Reads for a single device stay sequential on one thread, since they share a port.
+_sensor_read_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="sensor-read"
+)
+
+
+def _get_gas_mixer_data(port: str) -> Dict:
+    gas_mixer_status = gas_mixer.get_mixer_status_with_retry(port)
+    gas_ids = gas_mixer.get_gas_ids_with_retry(port)
+
+    return {
+        **{
+            f"{_GAS_MIXER_PREFIX}{key}": value
+            for key, value in gas_mixer_status.items()
+        },
+        **{f"{key} gas ID": value for key, value in gas_ids.items()},
+    }
+
+
+def _get_water_bath_data(port: str) -> Dict:
+    (
+        internal_temperature,
+        external_temperature,
+    ) = water_bath.send_read_commands_and_parse_responses(
+        port, ["Read Internal Temperature", "Read External Sensor"]
+    )
+
+    return {
+        "water bath internal temperature (C)": internal_temperature,
+        "water bath external sensor temperature (C)": external_temperature,
+    }
+
+
+def _get_ysi_data(port: str) -> Dict:
+    return {
+        f"YSI {key}": value
+        for key, value in ysi.get_standard_sensor_values(port).items()
+    }
+
+
+def get_all_sensor_data(com_ports: Dict) -> Dict:
+    """
+        Read the current values from each sensor in the calibration environment
 
-    gas_ids = gas_mixer.get_gas_ids_with_retry(com_ports["gas_mixer"]).add_suffix(
-        " gas ID"
+        Args:
+            com_ports: A dict of the com ports for each device, as in CalibrationConfiguration.com_ports
+
+        Returns a flat dict of sensor values, with keys prefixed or suffixed to identify the device
+    """
+    water_bath_data_future = _sensor_read_executor.submit(
+        _get_water_bath_data, com_ports["water_bath"]
     )
+    ysi_data_future = _sensor_read_executor.submit(_get_ysi_data, com_ports["ysi"])
+
+    try:
+        gas_mixer_data = _get_gas_mixer_data(com_ports["gas_mixer"])
+    finally:
+        # Even if the gas mixer read fails, don't return until the other ports are no longer in use
+        wait([water_bath_data_future, ysi_data_future])
+
+    # Build a plain dict rather than concatenating tiny Series: this runs for every row of data we collect.
+    # .result() re-raises any exception from the background reads
+    return {
+        **gas_mixer_data,
+        **water_bath_data_future.result(),
+        **ysi_data_future.result(),
+    }
+
+
+def get_gas_mixer_status(sensor_data: Dict) -> Dict:
+    """
+        Pull the gas mixer status back out of data from get_all_sensor_data(), so that it can be checked without
+        querying the gas mixer again.
+
+        Args:
+            sensor_data: A dict of sensor data (or a full row of data) from get_all_sensor_data()
+
+        Returns the gas mixer status as a dict, with the same keys as gas_mixer.get_mixer_status_with_retry()
+    """
+    return {
+        key[len(_GAS_MIXER_PREFIX) :]: value
+        for key, value in sensor_data.items()
+        if key.startswith(_GAS_MIXER_PREFIX)
+    }
+
+
+# Rows are buffered and appended to the output csv in batches through a long-lived file handle.
+# A batch is written once it has this many rows or this long has passed since the last write.
+_CSV_WRITE_BATCH_SIZE = 32
+_CSV_WRITE_MAX_INTERVAL_SECONDS = 30
+
+# Batches are written on a background thread so that a slow disk doesn't hold up data collection.
+# A single worker keeps batches in order.
+_csv_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-write")
+
+
+class _BufferedCsvWriter:
+    def __init__(self, csv_filepath: str):
+        self.csv_filepath = csv_filepath
+        # Sorted once from the first row so that columns are always in the same order without re-sorting every row
+        self.columns: List[str] = []
+        self.column_set: FrozenSet[str] = frozenset()
+        self.pending_rows: List[Dict] = []
+        self.last_write_time = time.monotonic()
+        # The most recent batch handed to the background writer thread
+        self.pending_write: Optional[Future] = None
+        # Opened on first write and kept open until close(), so that we don't re-open the file for every batch.
+        # Only used from the background writer thread (and close(), once all writes are done)
+        self.csv_file: Optional[TextIO] = None
+        # Any, since the csv writer's type (_csv._writer) is private
+        self.csv_writer: Optional[Any] = None
+
+    def write_row(self, row: Dict) -> None:
+        is_first_row = not self.columns
+        if is_first_row:
+            self.columns = sorted(row)
+            self.column_set = frozenset(self.columns)
+        elif not self.column_set.issuperset(row):
+            # Columns are fixed by the header, so values for any new fields would be silently dropped
+            unexpected_columns = sorted(set(row) - self.column_set)
+            raise ValueError(
+                f"Row has columns that aren't in {self.csv_filepath}: {unexpected_columns}"
+            )
+
+        self.pending_rows.append(row)
+
+        if is_first_row:
+            # Always write the first row right away so that the file (and its header) shows up as soon as we start
+            self.flush()
+        elif (
+            len(self.pending_rows) >= _CSV_WRITE_BATCH_SIZE
+            or time.monotonic() - self.last_write_time
+            >= _CSV_WRITE_MAX_INTERVAL_SECONDS
+        ):
+            self._start_write()
+
+    def _start_write(self) -> None:
+        """ Hand any pending rows to the background writer thread without waiting for them to be written """
+        if not self.pending_rows:
+            return
+
+        # The previous batch has had a whole batch interval to finish, so this shouldn't block.
+        # Waiting on it here makes sure that any error writing it gets raised.
+        self._wait_for_write()
+
+        self.pending_write = _csv_write_executor.submit(
+            self._write_rows, self.pending_rows
+        )
+        self.pending_rows = []
+        self.last_write_time = time.monotonic()
+
+    def _wait_for_write(self) -> None:
+        if self.pending_write is not None:
+            # Clear it first so that a failed write is only raised once, rather than by every later write and close
+            pending_write, self.pending_write = self.pending_write, None
+            # .result() re-raises any exception from the background write
+            pending_write.result()
 
-    water_bath_status = pd.Series(
-        {
-            "internal temperature (C)": water_bath.send_command_and_parse_response(
-                com_ports["water_bath"], "Read Internal Temperature"
-            ),
-            "external sensor temperature (C)": water_bath.send_command_and_parse_response(
-                com_ports["water_bath"], "Read External Sensor"
-            ),
-        }
-    ).add_prefix("water bath ")
+    def _write_rows(self, rows: List[Dict]) -> None:
+        if self.csv_file is None:
+            self.csv_file = open(self.csv_filepath, "a", newline="")
+            # Write values positionally with the stdlib csv writer rather than building a DataFrame for each batch.
+            # The csv writer still takes care of quoting, in case any string values contain commas.
+            self.csv_writer = csv.writer(self.csv_file, lineterminator="\n")
+            if self.csv_file.tell() == 0:
+                self.csv_writer.writerow(self.columns)
 
-    ysi_status = ysi.get_standard_sensor_values(com_ports["ysi"]).add_prefix("YSI ")
+        assert self.csv_writer is not None
+        self.csv_writer.writerows(
+            [row.get(column) for column in self.columns] for row in rows
+        )
+        # Make each batch visible to anyone reading the file while we're still running
+        self.csv_file.flush()
 
-    return pd.concat([gas_mixer_status, gas_ids, water_bath_status, ysi_status])
+    def flush(self) -> None:
+        """ Write any pending rows and wait for all writes to finish """
+        self._start_write()
+        self._wait_for_write()
 
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            # Don't leak the file handle if the last write failed
+            if self.csv_file is not None:
+                self.csv_file.close()
+                self.csv_file = None
+                self.csv_writer = None
 
-def _write_row_to_csv(csv_filepath: str, row: pd.Series) -> None:
+
+_csv_writers_by_filepath: Dict[str, _BufferedCsvWriter] = {}
+
+
+def _write_row_to_csv(csv_filepath: str, row: Dict) -> None:
     """
         Appends a row of data to a csv file. Adds a header line if it's a new file.
+        Rows are buffered and written in batches: use flush_csv_rows() to make sure all rows have been written.
 
         Args:
             csv_filepath: path to the csv file to append to
             row: dict representing the row
     """
-    row_df = pd.DataFrame([row]).sort_index(
-        axis=1
-    )  # Sort the index so columns are always in the same order
+    if csv_filepath not in _csv_writers_by_filepath:
+        _csv_writers_by_filepath[csv_filepath] = _BufferedCsvWriter(csv_filepath)
 
-    with open(csv_filepath, "a") as csv_file:
-        is_file_empty = csv_file.tell() == 0
-        row_df.to_csv(csv_file, index=False, header=is_file_empty, mode="a")
+    _csv_writers_by_filepath[csv_filepath].write_row(row)
 
 
-def collect_data_to_csv(
-    setpoint: pd.Series,
+def flush_csv_rows(csv_filepath: str) -> None:
+    """
+        Write any rows that are still buffered for a csv file
+
+        Args:
+            csv_filepath: path to the csv file
+    """
+    if csv_filepath in _csv_writers_by_filepath:
+        _csv_writers_by_filepath[csv_filepath].flush()
+
+
+def close_csv_file(csv_filepath: str) -> None:
+    """
+        Write any rows that are still buffered for a csv file and close the file
+
+        Args:
+            csv_filepath: path to the csv file
+    """
+    if csv_filepath in _csv_writers_by_filepath:
+        _csv_writers_by_filepath.pop(csv_filepath).close()
+
+
+def get_setpoint_data(
+    setpoint: Mapping,
     calibration_configuration: CalibrationConfiguration,
     loop_count: int = 0,
+) -> Dict:
+    """
+        Get the fields that are constant for every row of data collected at a setpoint, so that they only need to
+        be looked up once per setpoint rather than once per row.
+
+        Args:
+            setpoint: A setpoint, as a dict (or DataFrame row)
+            calibration_configuration: A CalibrationConfiguration object
+            loop_count: The current iteration of looping over the setpoint sequence file
+
+        Returns the dict of setpoint data to pass to collect_data_to_csv
+    """
+    return {
+        "loop count": loop_count,
+        "setpoint temperature (C)": setpoint["temperature"],
+        "setpoint hold time seconds": setpoint["hold_time"],
+        "setpoint flow rate (SLPM)": setpoint["flow_rate_slpm"],
+        "setpoint O2 fraction": setpoint["o2_fraction"],
+        "o2 source gas fraction": calibration_configuration.o2_source_gas_fraction,
+    }
+
+
+def collect_data_to_csv(
+    setpoint_data: Dict,
+    calibration_configuration: CalibrationConfiguration,
     equilibration_status: EquilibrationStatus = None,
 ):
     """
@@ -68,9 +288,8 @@ def collect_data_to_csv(
         with first row) to output csv along with configuration data.
 
         Args:
-            setpoint: A setpoint DataFrame row
+            setpoint_data: A dict of setpoint data from get_setpoint_data()
             calibration_configuration: A CalibrationConfiguration object
-            loop_count: The current iteration of looping over the setpoint sequence file
             equilibration_status: an EquilibrationStatus representing the current equilibration state
 
         Returns the dict of row data
@@ -79,21 +298,23 @@ def collect_data_to_csv(
     if equilibration_status is None:
         equilibration_status = EquilibrationStatus.EQUILIBRATED
 
-    # Read from each sensor and add to the DataFrame
+    # Read from each sensor and add to the row
     sensor_data = get_all_sensor_data(calibration_configuration.com_ports)
 
+    timestamp = datetime.now()
+
     full_data = {
-        "loop count": loop_count,
         "equilibration status": equilibration_status.value,
-        "setpoint temperature (C)": setpoint["temperature"],
-        "setpoint hold time seconds": setpoint["hold_time"],
-        "setpoint flow rate (SLPM)": setpoint["flow_rate_slpm"],
-        "setpoint O2 fraction": setpoint["o2_fraction"],
-        "o2 source gas fraction": calibration_configuration.o2_source_gas_fraction,
-        "timestamp": datetime.now(),
-        **dict(sensor_data),
+        **setpoint_data,
+        "timestamp": timestamp,
+        **sensor_data,
     }
 
-    _write_row_to_csv(calibration_configuration.output_csv_filepath, full_data)
+    # Format the timestamp ourselves (in the same format pandas would use) rather than leaving it to pandas'
+    # generic datetime formatting. The returned row keeps the datetime for use in equilibration checks.
+    _write_row_to_csv(
+        calibration_configuration.output_csv_filepath,
+        {**full_data, "timestamp": timestamp.isoformat(sep=" ")},
+    )
 
     return full_data
@@ -1,4 +1,7 @@
 import csv
+import time
+from datetime import datetime
+from unittest.mock import Mock
 
 import pytest
 import pandas as pd
@@ -9,12 +12,7 @@ from . import data_logging as module
 
 @pytest.fixture
 def mock_get_all_sensor_data(mocker):
-    return mocker.patch.object(module, "get_all_sensor_data", return_value=pd.Series())
-
-
-@pytest.fixture
-def mock_output_filepath(tmp_path):
-    return tmp_path / "test.csv"
+    return mocker.patch.object(module, "get_all_sensor_data", return_value={})
 
 
 class TestGetAllSensorData:
@@ -29,8 +27,10 @@ class TestGetAllSensorData:
             "get_gas_ids_with_retry",
             return_value=pd.Series({"N2": 0, "O2": 1}),
         )
-        mock_send_command_and_parse_response = mocker.patch.object(
-            module.water_bath, "send_command_and_parse_response"
+        mocker.patch.object(
+            module.water_bath,
+            "send_read_commands_and_parse_responses",
+            return_value=[15, 16],
         )
 
         mocker.patch.object(
@@ -39,34 +39,231 @@ class TestGetAllSensorData:
             return_value=pd.Series({"DO or something": 0, "temperature (C)": 1}),
         )
 
-        # Return values for "Read Internal Temperature" and
-        # "Read External Sensor", respectively
-        mock_send_command_and_parse_response.side_effect = [15, 16]
-
-        expected_sensor_data = pd.Series(
-            {
-                "gas mixer status": 0,
-                "gas mixer error": False,
-                "N2 gas ID": 0,
-                "O2 gas ID": 1,
-                "water bath internal temperature (C)": 15,
-                "water bath external sensor temperature (C)": 16,
-                "YSI DO or something": 0,
-                "YSI temperature (C)": 1,
-            }
-        )
+        expected_sensor_data = {
+            "gas mixer status": 0,
+            "gas mixer error": False,
+            "N2 gas ID": 0,
+            "O2 gas ID": 1,
+            "water bath internal temperature (C)": 15,
+            "water bath external sensor temperature (C)": 16,
+            "YSI DO or something": 0,
+            "YSI temperature (C)": 1,
+        }
 
         output_sensor_data = module.get_all_sensor_data(
             {"gas_mixer": "port 1", "water_bath": "port 2", "ysi": "port 3"}
         )
 
-        pd.testing.assert_series_equal(expected_sensor_data, output_sensor_data)
+        assert output_sensor_data == expected_sensor_data
+
+    def test_raises_ysi_read_error(self, mocker):
+        mocker.patch.object(module.gas_mixer, "get_mixer_status_with_retry")
+        mocker.patch.object(module.gas_mixer, "get_gas_ids_with_retry")
+        mocker.patch.object(
+            module.water_bath,
+            "send_read_commands_and_parse_responses",
+            return_value=[15, 16],
+        )
+        mocker.patch.object(
+            module.ysi,
+            "get_standard_sensor_values",
+            side_effect=ValueError("Mock YSI error"),
+        )
+
+        with pytest.raises(ValueError, match="Mock YSI error"):
+            module.get_all_sensor_data(
+                {"gas_mixer": "port 1", "water_bath": "port 2", "ysi": "port 3"}
+            )
+
+    def test_waits_for_other_reads_when_gas_mixer_read_fails(self, mocker):
+        mocker.patch.object(
+            module.gas_mixer,
+            "get_mixer_status_with_retry",
+            side_effect=ValueError("Mock gas mixer error"),
+        )
+        completed_reads = []
+
+        def slow_water_bath_read(*args):
+            time.sleep(0.05)
+            completed_reads.append("water bath")
+            return [15, 16]
+
+        mocker.patch.object(
+            module.water_bath,
+            "send_read_commands_and_parse_responses",
+            side_effect=slow_water_bath_read,
+        )
+        mocker.patch.object(module.ysi, "get_standard_sensor_values", return_value={})
+
+        with pytest.raises(ValueError, match="Mock gas mixer error"):
+            module.get_all_sensor_data(
+                {"gas_mixer": "port 1", "water_bath": "port 2", "ysi": "port 3"}
+            )
+
+        assert completed_reads == ["water bath"]
+
+
+class TestGetGasMixerStatus:
+    def test_returns_unprefixed_gas_mixer_fields(self):
+        sensor_data = {
+            "gas mixer low feed pressure alarm": False,
+            "gas mixer flow rate (SLPM)": 2.5,
+            "N2 gas ID": 0,
+            "YSI temperature (C)": 15,
+        }
+
+        assert module.get_gas_mixer_status(sensor_data) == {
+            "low feed pressure alarm": False,
+            "flow rate (SLPM)": 2.5,
+        }
+
+
+class TestWriteRowToCsv:
+    def test_writes_columns_in_sorted_order_for_every_row(self, mock_output_filepath):
+        module._write_row_to_csv(mock_output_filepath, {"b": 1, "a": 2})
+        module._write_row_to_csv(mock_output_filepath, {"a": 3, "b": 4})
+        module.flush_csv_rows(mock_output_filepath)
+
+        with open(mock_output_filepath) as csv_file:
+            assert list(csv.reader(csv_file)) == [["a", "b"], ["2", "1"], ["3", "4"]]
+
+    def test_buffers_rows_after_first_row_until_batch_is_full(
+        self, mocker, mock_output_filepath
+    ):
+        mocker.patch.object(module, "_CSV_WRITE_BATCH_SIZE", 3)
+
+        def _read_row_count():
+            # Wait for any batch that's being written in the background
+            module._csv_writers_by_filepath[mock_output_filepath]._wait_for_write()
+            with open(mock_output_filepath) as csv_file:
+                return len(list(csv.reader(csv_file))) - 1
+
+        module._write_row_to_csv(mock_output_filepath, {"a": 0})
+        assert _read_row_count() == 1
+
+        module._write_row_to_csv(mock_output_filepath, {"a": 1})
+        module._write_row_to_csv(mock_output_filepath, {"a": 2})
+        assert _read_row_count() == 1
+
+        module._write_row_to_csv(mock_output_filepath, {"a": 3})
+        assert _read_row_count() == 4
+
+    def test_flush_writes_buffered_rows(self, mock_output_filepath):
+        for value in range(3):
+            module._write_row_to_csv(mock_output_filepath, {"a": value})
+
+        module.flush_csv_rows(mock_output_filepath)
+
+        with open(mock_output_filepath) as csv_file:
+            assert list(csv.reader(csv_file)) == [["a"], ["0"], ["1"], ["2"]]
+
+    def test_close_writes_buffered_rows_and_reopening_appends_without_header(
+        self, mock_output_filepath
+    ):
+        module._write_row_to_csv(mock_output_filepath, {"a": 0})
+        module._write_row_to_csv(mock_output_filepath, {"a": 1})
+        module.close_csv_file(mock_output_filepath)
+
+        module._write_row_to_csv(mock_output_filepath, {"a": 2})
+        module.close_csv_file(mock_output_filepath)
+
+        with open(mock_output_filepath) as csv_file:
+            assert list(csv.reader(csv_file)) == [["a"], ["0"], ["1"], ["2"]]
+
+    def test_raises_errors_from_background_writes(self, mocker, mock_output_filepath):
+        mocker.patch.object(module, "_CSV_WRITE_BATCH_SIZE", 2)
+        module._write_row_to_csv(mock_output_filepath, {"a": 0})
+
+        mocker.patch.object(
+            module._BufferedCsvWriter, "_write_rows", side_effect=OSError("Disk full")
+        )
+        # Fills a batch, which gets written in the background
+        module._write_row_to_csv(mock_output_filepath, {"a": 1})
+        module._write_row_to_csv(mock_output_filepath, {"a": 2})
+
+        with pytest.raises(OSError, match="Disk full"):
+            module.flush_csv_rows(mock_output_filepath)
+
+    def test_background_write_error_is_only_raised_once(
+        self, mocker, mock_output_filepath
+    ):
+        mocker.patch.object(module, "_CSV_WRITE_BATCH_SIZE", 2)
+        module._write_row_to_csv(mock_output_filepath, {"a": 0})
+        writer = module._csv_writers_by_filepath[mock_output_filepath]
+
+        mocker.patch.object(
+            module._BufferedCsvWriter, "_write_rows", side_effect=OSError("Disk full")
+        )
+        module._write_row_to_csv(mock_output_filepath, {"a": 1})
+        module._write_row_to_csv(mock_output_filepath, {"a": 2})
+
+        with pytest.raises(OSError, match="Disk full"):
+            module.flush_csv_rows(mock_output_filepath)
+
+        # Closing afterwards doesn't raise the same error again, and closes the file
+        module.close_csv_file(mock_output_filepath)
+        assert writer.csv_file is None
+
+    def test_close_closes_file_even_if_last_write_fails(
+        self, mocker, mock_output_filepath
+    ):
+        module._write_row_to_csv(mock_output_filepath, {"a": 0})
+        writer = module._csv_writers_by_filepath[mock_output_filepath]
+        csv_file = writer.csv_file
+        assert csv_file is not None
+
+        mocker.patch.object(
+            module._BufferedCsvWriter, "_write_rows", side_effect=OSError("Disk full")
+        )
+        module._write_row_to_csv(mock_output_filepath, {"a": 1})
+
+        with pytest.raises(OSError, match="Disk full"):
+            module.close_csv_file(mock_output_filepath)
+
+        assert csv_file.closed
+
+    def test_raises_on_unexpected_columns(self, mock_output_filepath):
+        module._write_row_to_csv(mock_output_filepath, {"a": 0})
+
+        with pytest.raises(ValueError, match=r"\['b'\]"):
+            module._write_row_to_csv(mock_output_filepath, {"a": 1, "b": 2})
+
+    def test_quotes_values_containing_commas(self, mock_output_filepath):
+        module._write_row_to_csv(mock_output_filepath, {"a": "1, 2", "b": 3.5})
+
+        with open(mock_output_filepath) as csv_file:
+            assert list(csv.reader(csv_file)) == [["a", "b"], ["1, 2", "3.5"]]
+
+
+class TestGetSetpointData:
+    def test_includes_setpoint_and_configuration_values(self):
+        setpoint = {
+            "temperature": 15,
+            "hold_time": 300,
+            "flow_rate_slpm": 2.5,
+            "o2_fraction": 0.2,
+        }
+        configuration = Mock(o2_source_gas_fraction=0.21)
+
+        setpoint_data = module.get_setpoint_data(setpoint, configuration, loop_count=2)
+
+        assert setpoint_data == {
+            "loop count": 2,
+            "setpoint temperature (C)": 15,
+            "setpoint hold time seconds": 300,
+            "setpoint flow rate (SLPM)": 2.5,
+            "setpoint O2 fraction": 0.2,
+            "o2 source gas fraction": 0.21,
+        }
 
 
 class TestCollectDataToCsv:
-    default_setpoint = pd.Series(
-        {"temperature": 15, "hold_time": 300, "flow_rate_slpm": 2.5, "o2_fraction": 0.2}
-    )
+    default_setpoint = {
+        "temperature": 15,
+        "hold_time": 300,
+        "flow_rate_slpm": 2.5,
+        "o2_fraction": 0.2,
+    }
     default_configuration = CalibrationConfiguration(
         setpoint_sequence_csv_filepath="experiment.csv",
         setpoints=default_setpoint,
@@ -75,6 +272,7 @@ class TestCollectDataToCsv:
         loop=False,
         output_csv_filepath="test.csv",
         collection_interval=0.1,
+        equilibration_collection_interval=0.1,
         cosmobot_experiment_name="frankenstein",
         cosmobot_hostnames=["cosmo"],
         cosmobot_exposure_time=0.5,
@@ -87,14 +285,14 @@ class TestCollectDataToCsv:
         )
 
         module.collect_data_to_csv(
-            self.default_setpoint, test_configuration, loop_count=0
+            module.get_setpoint_data(self.default_setpoint, test_configuration),
+            test_configuration,
         )
 
-        # Use chunksize=1 to get a file reader that iterates over rows
-        output_csv = pd.read_csv(mock_output_filepath, chunksize=1)
-        first_row = output_csv.__next__()
+        with open(mock_output_filepath, newline="") as output_csv:
+            headers = next(csv.reader(output_csv))
 
-        assert list(first_row) == [
+        assert headers == [
             "equilibration status",
             "loop count",
             "o2 source gas fraction",
@@ -114,8 +312,10 @@ class TestCollectDataToCsv:
 
         for _ in range(2):
             module.collect_data_to_csv(
-                self.default_setpoint, test_configuration, loop_count=0
+                module.get_setpoint_data(self.default_setpoint, test_configuration),
+                test_configuration,
             )
+        module.flush_csv_rows(mock_output_filepath)
 
         expected_headers = [
             "equilibration status",
@@ -138,23 +338,26 @@ class TestCollectDataToCsv:
                 assert row != expected_headers
 
     def test_saves_expected_data(self, mock_output_filepath, mock_get_all_sensor_data):
-        test_setpoint = pd.Series(
-            {
-                "temperature": 15,
-                "hold_time": 300,
-                "flow_rate_slpm": 2.5,
-                "o2_fraction": 0.2,
-            }
-        )
+        test_setpoint = {
+            "temperature": 15,
+            "hold_time": 300,
+            "flow_rate_slpm": 2.5,
+            "o2_fraction": 0.2,
+        }
         test_configuration = self.default_configuration._replace(
             output_csv_filepath=mock_output_filepath, o2_source_gas_fraction=0.23
         )
 
-        mock_get_all_sensor_data.return_value = pd.Series(
-            {"value 0": 0, "value 1": 1, "value 2": 2}
-        )
+        mock_get_all_sensor_data.return_value = {
+            "value 0": 0,
+            "value 1": 1,
+            "value 2": 2,
+        }
 
-        module.collect_data_to_csv(test_setpoint, test_configuration, loop_count=0)
+        module.collect_data_to_csv(
+            module.get_setpoint_data(test_setpoint, test_configuration),
+            test_configuration,
+        )
 
         expected_csv = pd.DataFrame(
             [
@@ -164,8 +367,8 @@ class TestCollectDataToCsv:
                     "o2 source gas fraction": 0.23,
                     "setpoint O2 fraction": 0.2,
                     "setpoint flow rate (SLPM)": 2.5,
-                    "setpoint hold time seconds": 300.0,
-                    "setpoint temperature (C)": 15.0,
+                    "setpoint hold time seconds": 300,
+                    "setpoint temperature (C)": 15,
                     "value 0": 0,
                     "value 1": 1,
                     "value 2": 2,
@@ -176,3 +379,23 @@ class TestCollectDataToCsv:
         output_csv = pd.read_csv(mock_output_filepath).drop(columns=["timestamp"])
 
         pd.testing.assert_frame_equal(expected_csv, output_csv)
+
+    def test_saves_formatted_timestamp_and_returns_datetime(
+        self, mocker, mock_output_filepath, mock_get_all_sensor_data
+    ):
+        test_configuration = self.default_configuration._replace(
+            output_csv_filepath=mock_output_filepath
+        )
+        timestamp = datetime(2019, 1, 1, 12, 30, 15, 123456)
+        mocker.patch.object(module, "datetime").now.return_value = timestamp
+
+        row = module.collect_data_to_csv(
+            module.get_setpoint_data(self.default_setpoint, test_configuration),
+            test_configuration,
+        )
+
+        with open(mock_output_filepath) as csv_file:
+            output_row = next(csv.DictReader(csv_file))
+
+        assert output_row["timestamp"] == "2019-01-01 12:30:15.123456"
+        assert row["timestamp"] == timestamp
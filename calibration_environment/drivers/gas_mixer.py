@@ -2,7 +2,7 @@ import logging
 import re
 from collections import namedtuple
 from enum import IntEnum
-from typing import Tuple, List
+from typing import Tuple, List, Mapping
 
 import pandas as pd
 
@@ -349,32 +349,43 @@ get_mixer_status_with_retry = retry_on_exception(UnexpectedMixerResponse)(
 )
 
 
-def _get_error_statuses(status: pd.Series) -> List[str]:
+def _get_error_statuses(status: Mapping) -> List[str]:
     errors = [
         status_key
-        for status_key, status_value in status.to_dict().items()
+        for status_key, status_value in status.items()
         if status_value and _ALARM_KEYWORD in status_key
     ]
     return errors
 
 
-def _assert_status_ok(port: str) -> None:
-    """ Query mix module status and raise an exception if any inputs have insufficient pressure
+def assert_mixer_status_ok(status: Mapping) -> None:
+    """ Raise an exception if an already-queried mix module status shows that any inputs have insufficient pressure
 
     Args:
-        port: serial port to connect to, e.g. COM19 on Windows and /dev/ttyUSB0 on linux
+        status: mixer status, as returned by get_mixer_status_with_retry()
     Returns:
         None
     Raises:
         GasMixerStatusError with a list of error or warning flags if gas inputs have insufficient pressure
     """
-
-    status = _get_mixer_status(port)
     errors = _get_error_statuses(status)
     if errors:
         raise GasMixerStatusError(errors)
 
 
+def _assert_status_ok(port: str) -> None:
+    """ Query mix module status and raise an exception if any inputs have insufficient pressure
+
+    Args:
+        port: serial port to connect to, e.g. COM19 on Windows and /dev/ttyUSB0 on linux
+    Returns:
+        None
+    Raises:
+        GasMixerStatusError with a list of error or warning flags if gas inputs have insufficient pressure
+    """
+    assert_mixer_status_ok(_get_mixer_status(port))
+
+
 assert_status_ok_with_retry = retry_on_exception(UnexpectedMixerResponse)(
     _assert_status_ok
 )
@@ -343,6 +343,21 @@ class TestAssertStatusOk:
             module._assert_status_ok(sentinel.port)
 
 
+class TestAssertMixerStatusOk:
+    @pytest.mark.parametrize("alarm_raised", [True, False])
+    def test_raises_based_on_alarm_key_in_dict(self, alarm_raised):
+        status = {
+            "Everything is OK": True,
+            f"some type of {module._ALARM_KEYWORD}": alarm_raised,
+        }
+
+        if alarm_raised:
+            with pytest.raises(module.GasMixerStatusError):
+                module.assert_mixer_status_ok(status)
+        else:
+            module.assert_mixer_status_ok(status)
+
+
 class TestParseGasIds:
     def test_parses_gas_ids(self):
         expected = pd.Series({"N2": 1, "O2 source gas": 4})
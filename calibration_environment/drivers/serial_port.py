@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import List, Optional
 
 import serial
 
@@ -35,16 +35,55 @@ def send_serial_command_and_get_response(
         serial.SerialException if serial port can't be opened
         ValueError if parameters are out of range, e.g. baud rate etc.
     """
-    logger.debug(f"Serial command on {port}: {command!r}")
+    return send_serial_commands_and_get_responses(
+        port,
+        [command],
+        response_terminator=response_terminator,
+        max_response_bytes=max_response_bytes,
+        baud_rate=baud_rate,
+        timeout=timeout,
+    )[0]
+
+
+def send_serial_commands_and_get_responses(
+    port: str,
+    commands: List[bytes],
+    response_terminator: Optional[bytes] = None,
+    max_response_bytes: Optional[int] = None,
+    baud_rate: int = 19200,
+    timeout: float = 0.1,
+) -> List[bytes]:
+    """ Send a sequence of commands on a serial port, waiting for the response to each command before sending the
+    next one. Uses a single connection for all of the commands, rather than opening the port for each command.
+
+    Args:
+        port: serial port to use, e.g. "COM11"
+        commands: byte strings to send
+        response_terminator, max_response_bytes, baud_rate, timeout: see send_serial_command_and_get_response()
+
+    Returns:
+        list of response byte strings from the serial port, one for each command
+
+    Raises:
+        serial.SerialException if serial port can't be opened
+        ValueError if parameters are out of range, e.g. baud rate etc.
+    """
+    responses = []
 
     with serial.Serial(port, baudrate=baud_rate, timeout=timeout) as connection:
-        connection.write(command)
-        response = (
-            connection.read_until(response_terminator, max_response_bytes)
-            if response_terminator
-            else connection.read(max_response_bytes)
-        )
+        for command in commands:
+            # %-style args so that nothing is formatted unless debug logging is enabled
+            logger.debug("Serial command on %s: %r", port, command)
+
+            connection.write(command)
+            response = (
+                connection.read_until(response_terminator, max_response_bytes)
+                if response_terminator
+                else connection.read(max_response_bytes)
+            )
+
+            logger.debug("Serial response on %s: %s", port, response)
 
-    logger.debug(f"Serial response on {port}: {response}")
+            responses.append(response)
 
-    return response
+    return responses
@@ -1,4 +1,4 @@
-from unittest.mock import sentinel
+from unittest.mock import call, sentinel
 
 import pytest
 
@@ -93,9 +93,33 @@ class TestSendSerialCommandAndGetResponse:
 
         mock_debug_logger.assert_has_calls(
             [
-                mocker.call("Serial command on sentinel.port: sentinel.command"),
                 mocker.call(
-                    "Serial response on sentinel.port: sentinel.response_bytes"
+                    "Serial command on %s: %r", sentinel.port, sentinel.command
+                ),
+                mocker.call(
+                    "Serial response on %s: %s", sentinel.port, sentinel.response_bytes
                 ),
             ]
         )
+
+
+class TestSendSerialCommandsAndGetResponses:
+    def test_sends_all_commands_on_one_connection(
+        self, mock_serial_class_and_connection
+    ):
+        mock_serial_class, mock_connection = mock_serial_class_and_connection
+        mock_connection.read.side_effect = [sentinel.response_1, sentinel.response_2]
+
+        actual_responses = module.send_serial_commands_and_get_responses(
+            port=sentinel.port,
+            commands=[sentinel.command_1, sentinel.command_2],
+            max_response_bytes=sentinel.max_response_bytes,
+            baud_rate=sentinel.baud_rate,
+            timeout=sentinel.timeout,
+        )
+
+        mock_serial_class.assert_called_once()
+        mock_connection.write.assert_has_calls(
+            [call(sentinel.command_1), call(sentinel.command_2)]
+        )
+        assert actual_responses == [sentinel.response_1, sentinel.response_2]
@@ -1,4 +1,7 @@
-from .serial import send_command_and_parse_response  # noqa: F401 unused imports
+from .serial import (  # noqa: F401 unused imports
+    send_command_and_parse_response,
+    send_read_commands_and_parse_responses,
+)
 from .setpoint import (  # noqa: F401 unused imports
     get_temperature_setpoint_validation_errors,
 )
@@ -1,6 +1,9 @@
 # Serial communications protocol for the NESLAB RTE 17 temperature-controlled water bath
+from typing import List
+
 from calibration_environment.drivers.serial_port import (
     send_serial_command_and_get_response,
+    send_serial_commands_and_get_responses,
 )
 from calibration_environment.drivers.water_bath.constants import (
     DEFAULT_PREFIX,
@@ -254,22 +257,41 @@ def _check_for_error_response(serial_packet: SerialPacket):
         )
 
 
+# longest message is 14 bytes: there's no consistent termination character in the water bath response,
+# so use this to always listen until the timeout.
+_MORE_THAN_ENOUGH_RESPONSE_BYTES = 20
+_RESPONSE_TIMEOUT = 0.1
+
+
 def send_command(port: str, command_packet: SerialPacket) -> SerialPacket:
     """ Send command packet bytes to the bath and collect response
     """
-
-    # longest message is 14 bytes: there's no consistent termination character in the water bath response,
-    # so use this to always listen until the timeout.
-    more_than_enough_bytes = 20
-
     response_bytes = send_serial_command_and_get_response(
         port=port,
         command=command_packet.to_bytes(),
-        max_response_bytes=more_than_enough_bytes,
+        max_response_bytes=_MORE_THAN_ENOUGH_RESPONSE_BYTES,
+        baud_rate=DEFAULT_BAUD_RATE,
+        timeout=_RESPONSE_TIMEOUT,
+    )
+
+    return _parse_response(response_bytes)
+
+
+def send_commands(port: str, command_packets: List[SerialPacket]) -> List[SerialPacket]:
+    """ Send a sequence of command packets to the bath over a single serial connection and collect the responses
+    """
+    responses_bytes = send_serial_commands_and_get_responses(
+        port=port,
+        commands=[command_packet.to_bytes() for command_packet in command_packets],
+        max_response_bytes=_MORE_THAN_ENOUGH_RESPONSE_BYTES,
         baud_rate=DEFAULT_BAUD_RATE,
-        timeout=0.1,
+        timeout=_RESPONSE_TIMEOUT,
     )
 
+    return [_parse_response(response_bytes) for response_bytes in responses_bytes]
+
+
+def _parse_response(response_bytes: bytes) -> SerialPacket:
     try:
         serial_packet = SerialPacket.from_bytes(response_bytes)
     except Exception as e:
@@ -326,3 +348,28 @@ def send_command_and_parse_response(
     response_packet = send_command(port, command_packet)
 
     return _parse_data_bytes_as_float(response_packet.data_bytes, REPORTING_PRECISION)
+
+
+def send_read_commands_and_parse_responses(
+    port: str, command_names: List[str]
+) -> List[float]:
+    """ Send a sequence of Read commands to the water bath and parse the response data.
+        The bath only supports reading one value per command, so this sends the commands one after another over a
+        single serial connection, rather than opening the port for each command.
+
+        Args:
+            port: The comm port used by the water bath
+            command_names: The names of the Read commands to execute. See COMMAND_NAME_TO_HEX for options
+
+        Returns:
+            The values read, in the same order as command_names
+    """
+    response_packets = send_commands(
+        port,
+        [_construct_command_packet(command_name) for command_name in command_names],
+    )
+
+    return [
+        _parse_data_bytes_as_float(response_packet.data_bytes, REPORTING_PRECISION)
+        for response_packet in response_packets
+    ]
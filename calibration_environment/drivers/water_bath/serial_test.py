@@ -49,6 +49,26 @@ class TestSendCommand:
             module.send_command(sentinel.port, mock_command_packet)
 
 
+class TestSendReadCommandsAndParseResponses:
+    def test_sends_commands_together_and_parses_values(self, mocker):
+        mock_send_serial_commands = mocker.patch.object(
+            module,
+            "send_serial_commands_and_get_responses",
+            return_value=[
+                b"\xCA\x00\x01\x20\x03\x21\x02\x71\x47",
+                b"\xCA\x00\x01\x21\x03\x21\x02\x72\x45",
+            ],
+        )
+
+        actual = module.send_read_commands_and_parse_responses(
+            sentinel.port, ["Read Internal Temperature", "Read External Sensor"]
+        )
+
+        assert actual == pytest.approx([6.25, 6.26])
+        mock_send_serial_commands.assert_called_once()
+        assert len(mock_send_serial_commands.call_args[1]["commands"]) == 2
+
+
 class TestCheckForErrorResponse:
     def test_check_for_error_response_returns_none_on_normal_response(self):
         serial_packet = module.SerialPacket(
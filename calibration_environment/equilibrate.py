@@ -1,18 +1,25 @@
 import datetime
 import logging
-from time import sleep
-
-import pandas as pd
+import math
+from collections import deque
+from time import monotonic, sleep
+from typing import Deque, Dict, Sequence
 
 from calibration_environment.status import check_status
 from .configure import CalibrationConfiguration
-from .data_logging import collect_data_to_csv, EquilibrationStatus
+from .data_logging import (
+    collect_data_to_csv,
+    get_gas_mixer_status,
+    EquilibrationStatus,
+)
 
 
 logger = logging.getLogger(__name__)
 
 _TEMPERATURE_MAXIMUM_EQUILIBRATED_VARIATION = 0.1  # degrees C
 _TEMPERATURE_MINIMUM_STABLE_TIME = datetime.timedelta(minutes=5)
+# Once temperature has equilibrated, a shorter window is enough to confirm that restarting gas flow didn't disturb it
+_TEMPERATURE_CONFIRMATION_STABLE_TIME = datetime.timedelta(minutes=1)
 
 _DO_MAXIMUM_EQUILIBRATED_VARIATION_MMHG = 0.5  # DO mmHg
 _DO_MINIMUM_STABLE_TIME = datetime.timedelta(minutes=5)
@@ -23,16 +30,16 @@ _TIMESTAMP_FIELD_NAME = "timestamp"
 
 
 def _is_field_equilibrated(
-    sensor_data_log: pd.DataFrame,
-    field_name: str,
+    timestamps: Sequence[datetime.datetime],
+    values: Sequence[float],
     max_variation: float,
     min_stable_time: datetime.timedelta,
 ):
-    """Determines whether the data in field_name of sensor_data_log has equilibrated.
+    """Determines whether the readings of a field have equilibrated.
 
     Args:
-        sensor_data_log: pd.DataFrame containing rows of values returned from collect_data_to_csv
-        field_name: name of the column in sensor_data_log to read for determining equilibration
+        timestamps: timestamps of the readings, as returned from collect_data_to_csv
+        values: the field's value in each reading, in the same order as timestamps
         max_variation: the maximum difference between the min and max in the last min_stable_time
             of data for equilibration
         min_stable_time: the minimum amount of time to have been stable (according to max_variation)
@@ -42,84 +49,107 @@ def _is_field_equilibrated(
         True if the field's values have equilbrated
         False if they have not equilibrated or if we don't have at least min_stable_time of data
     """
-    oldest_timestamp = sensor_data_log[_TIMESTAMP_FIELD_NAME].min()
-    newest_timestamp = sensor_data_log[_TIMESTAMP_FIELD_NAME].max()
+    oldest_timestamp = min(timestamps)
+    newest_timestamp = max(timestamps)
 
     # ensure we have enough data
     if newest_timestamp - oldest_timestamp < min_stable_time:
         return False
 
     window_start_timestamp = newest_timestamp - min_stable_time
-    data_window = sensor_data_log[
-        sensor_data_log[_TIMESTAMP_FIELD_NAME] >= window_start_timestamp
+    # Skip missing readings, like pandas' min() and max() do
+    window_values = [
+        value
+        for timestamp, value in zip(timestamps, values)
+        if timestamp >= window_start_timestamp and not math.isnan(value)
     ]
-
-    max_value = data_window[field_name].max()
-    min_value = data_window[field_name].min()
+    if not window_values:
+        return False
 
     # round to get rid of floating point error
-    variation = round(max_value - min_value, 5)
+    variation = round(max(window_values) - min(window_values), 5)
     return variation <= max_variation
 
 
 def _wait_for_equilibration(
     calibration_configuration: CalibrationConfiguration,
-    setpoint: pd.Series,
-    loop_count: int,
+    setpoint_data: Dict,
     equilibration_status: EquilibrationStatus,
     field_name: str,
     max_variation: float,
     min_stable_time: datetime.timedelta,
-):
-    sensor_data_log = pd.DataFrame()
+) -> Dict:
+    """Collects data until field_name has equilibrated, and returns the last row of data collected"""
+    # Only keep the readings that equilibration is checked against, so that each check takes about the same time
+    # however long we've been waiting
+    timestamps: Deque[datetime.datetime] = deque()
+    values: Deque[float] = deque()
+    # Schedule collections from a fixed anchor so that the time spent reading sensors doesn't add to the interval
+    next_collection_time = monotonic()
 
     while True:
+        next_collection_time += (
+            calibration_configuration.equilibration_collection_interval
+        )
         current_sensor_data = collect_data_to_csv(
-            setpoint,
+            setpoint_data,
             calibration_configuration,
-            loop_count=loop_count,
             equilibration_status=equilibration_status,
         )
-        sensor_data_log = sensor_data_log.append(current_sensor_data, ignore_index=True)
-
-        check_status(calibration_configuration.com_ports)
+        timestamps.append(current_sensor_data[_TIMESTAMP_FIELD_NAME])
+        values.append(current_sensor_data[field_name])
+
+        # Drop the oldest reading once the next one is old enough to show that we have min_stable_time of data
+        window_start_timestamp = timestamps[-1] - min_stable_time
+        while len(timestamps) > 1 and timestamps[1] <= window_start_timestamp:
+            timestamps.popleft()
+            values.popleft()
+
+        # Check the gas mixer status we just read rather than querying the gas mixer again
+        check_status(
+            calibration_configuration.com_ports,
+            gas_mixer_status=get_gas_mixer_status(current_sensor_data),
+        )
 
-        if _is_field_equilibrated(
-            sensor_data_log, field_name, max_variation, min_stable_time
-        ):
-            return sensor_data_log
+        if _is_field_equilibrated(timestamps, values, max_variation, min_stable_time):
+            return current_sensor_data
 
-        sleep(5)
+        # If a collection ran past its slot (e.g. serial retries), pick the schedule back up from now rather than
+        # running collections back to back until it catches up
+        now = monotonic()
+        next_collection_time = max(next_collection_time, now)
+        # time.sleep() is still interrupted by Ctrl-C (KeyboardInterrupt) no matter how long it is
+        sleep(next_collection_time - now)
 
 
 def wait_for_temperature_equilibration(
     calibration_configuration: CalibrationConfiguration,
-    setpoint: pd.Series,
-    loop_count: int,
+    setpoint_data: Dict,
+    min_stable_time: datetime.timedelta = _TEMPERATURE_MINIMUM_STABLE_TIME,
 ) -> None:
     """
     Returns once temperature has not changed by more than
-    _TEMPERATURE_MAXIMUM_EQUILIBRATED_VARIATION degrees C for the last
-    _TEMPERATURE_MINIMUM_STABLE_TIME.
+    _TEMPERATURE_MAXIMUM_EQUILIBRATED_VARIATION degrees C for the last min_stable_time.
 
     Args:
         calibration_configuration: CalibrationConfiguration object
-        setpoint: pd.Series of setpoint for logging
-        loop_count: loop iteration of the main calibration run loop
+        setpoint_data: dict of setpoint data for logging, from data_logging.get_setpoint_data()
+        min_stable_time: Optional. How long temperature must have been stable. Pass a shorter time (e.g.
+            _TEMPERATURE_CONFIRMATION_STABLE_TIME) to confirm that temperature is still equilibrated after a small
+            disturbance such as restarting gas flow. Default: _TEMPERATURE_MINIMUM_STABLE_TIME
     """
     logger.info("waiting for water bath temperature equilibration")
 
-    sensor_data_log = _wait_for_equilibration(
+    sensor_data = _wait_for_equilibration(
         calibration_configuration,
-        setpoint,
-        loop_count,
+        setpoint_data,
         EquilibrationStatus.TEMPERATURE,
         _YSI_TEMPERATURE_FIELD_NAME,
         _TEMPERATURE_MAXIMUM_EQUILIBRATED_VARIATION,
-        _TEMPERATURE_MINIMUM_STABLE_TIME,
+        min_stable_time,
     )
 
-    current_temperature = sensor_data_log[_YSI_TEMPERATURE_FIELD_NAME].iloc[-1]
+    current_temperature = sensor_data[_YSI_TEMPERATURE_FIELD_NAME]
     logger.info(
         f"water bath temperature equilibrated (current temperature according to "
         f'"{_YSI_TEMPERATURE_FIELD_NAME}": {current_temperature}°C)'
@@ -127,9 +157,7 @@ def wait_for_temperature_equilibration(
 
 
 def wait_for_do_equilibration(
-    calibration_configuration: CalibrationConfiguration,
-    setpoint: pd.Series,
-    loop_count: int,
+    calibration_configuration: CalibrationConfiguration, setpoint_data: Dict
 ) -> None:
     """
     Returns once DO level has not changed by more than
@@ -138,23 +166,21 @@ def wait_for_do_equilibration(
 
     Args:
         calibration_configuration: CalibrationConfiguration object
-        setpoint: pd.Series of setpoint for logging
-        loop_count: loop iteration of the main calibration run loop
+        setpoint_data: dict of setpoint data for logging, from data_logging.get_setpoint_data()
     """
 
     logger.info("waiting for DO equilibration")
 
-    sensor_data_log = _wait_for_equilibration(
+    sensor_data = _wait_for_equilibration(
         calibration_configuration,
-        setpoint,
-        loop_count,
+        setpoint_data,
         EquilibrationStatus.DO,
         _YSI_DO_MMHG_FIELD_NAME,
         _DO_MAXIMUM_EQUILIBRATED_VARIATION_MMHG,
         _DO_MINIMUM_STABLE_TIME,
     )
 
-    current_do_mgl = sensor_data_log[_YSI_DO_MMHG_FIELD_NAME].iloc[-1]
+    current_do_mgl = sensor_data[_YSI_DO_MMHG_FIELD_NAME]
     logger.info(
         f"DO equilibrated (current DO level according to "
         f'"{_YSI_DO_MMHG_FIELD_NAME}": {current_do_mgl} mmHg)'
@@ -1,7 +1,6 @@
 import datetime
-from unittest.mock import Mock, sentinel
+from unittest.mock import Mock, call, sentinel
 
-import pandas as pd
 import pytest
 
 from .data_logging import EquilibrationStatus
@@ -15,65 +14,64 @@ from . import equilibrate as module
 
 class TestIsFieldEquilibrated:
     def test_success(self):
-        field_name = sentinel.field_name
         max_variation = 0.1
         min_stable_time = datetime.timedelta(minutes=5)
         now = datetime.datetime.now()
         five_minutes_ago = now - datetime.timedelta(minutes=5)
-        test_data = [
-            {field_name: 10.3, _TIMESTAMP_FIELD_NAME: five_minutes_ago},
-            {field_name: 10.2, _TIMESTAMP_FIELD_NAME: now},
-        ]
+        timestamps = [five_minutes_ago, now]
+        values = [10.3, 10.2]
 
         assert module._is_field_equilibrated(
-            pd.DataFrame(test_data), field_name, max_variation, min_stable_time
+            timestamps, values, max_variation, min_stable_time
         )
 
     def test_has_enough_data_and_not_equilibrated(self):
-        field_name = sentinel.field_name
         max_variation = 0.1
         min_stable_time = datetime.timedelta(minutes=5)
         now = datetime.datetime.now()
         five_minutes_ago = now - datetime.timedelta(minutes=5)
-        test_data = [
-            {field_name: 10.0, _TIMESTAMP_FIELD_NAME: five_minutes_ago},
-            {field_name: 10.2, _TIMESTAMP_FIELD_NAME: now},
-        ]
+        timestamps = [five_minutes_ago, now]
+        values = [10.0, 10.2]
 
         assert not module._is_field_equilibrated(
-            pd.DataFrame(test_data), field_name, max_variation, min_stable_time
+            timestamps, values, max_variation, min_stable_time
         )
 
     def test_not_enough_data(self):
-        field_name = sentinel.field_name
         max_variation = 0.1
         min_stable_time = datetime.timedelta(minutes=5)
         now = datetime.datetime.now()
         four_minutes_ago = now - datetime.timedelta(minutes=4)
-        test_data = [
-            {field_name: 10.3, _TIMESTAMP_FIELD_NAME: four_minutes_ago},
-            {field_name: 10.2, _TIMESTAMP_FIELD_NAME: now},
-        ]
+        timestamps = [four_minutes_ago, now]
+        values = [10.3, 10.2]
 
         assert not module._is_field_equilibrated(
-            pd.DataFrame(test_data), field_name, max_variation, min_stable_time
+            timestamps, values, max_variation, min_stable_time
         )
 
     def test_ignores_old_data(self):
-        field_name = sentinel.field_name
         max_variation = 0.1
         min_stable_time = datetime.timedelta(minutes=5)
         now = datetime.datetime.now()
         four_minutes_ago = now - datetime.timedelta(minutes=4)
         over_five_minutes_ago = now - datetime.timedelta(minutes=10)
-        test_data = [
-            {field_name: 4.3, _TIMESTAMP_FIELD_NAME: over_five_minutes_ago},
-            {field_name: 10.3, _TIMESTAMP_FIELD_NAME: four_minutes_ago},
-            {field_name: 10.2, _TIMESTAMP_FIELD_NAME: now},
-        ]
+        timestamps = [over_five_minutes_ago, four_minutes_ago, now]
+        values = [4.3, 10.3, 10.2]
 
         assert module._is_field_equilibrated(
-            pd.DataFrame(test_data), field_name, max_variation, min_stable_time
+            timestamps, values, max_variation, min_stable_time
+        )
+
+    def test_ignores_missing_readings(self):
+        max_variation = 0.1
+        min_stable_time = datetime.timedelta(minutes=5)
+        now = datetime.datetime.now()
+        five_minutes_ago = now - datetime.timedelta(minutes=5)
+        timestamps = [five_minutes_ago, now - datetime.timedelta(minutes=1), now]
+        values = [10.3, float("nan"), 10.2]
+
+        assert module._is_field_equilibrated(
+            timestamps, values, max_variation, min_stable_time
         )
 
 
@@ -90,8 +88,14 @@ def mock_check_status(mocker):
 class TestWaitForEquilibration:
     @staticmethod
     def _mock_collect_data_to_csv(mocker, temperature_readings):
+        # One reading a minute
+        start_time = datetime.datetime(2020, 1, 1)
         sensor_data_sequence = [
-            pd.Series({_YSI_TEMPERATURE_FIELD_NAME: t}) for t in temperature_readings
+            {
+                _YSI_TEMPERATURE_FIELD_NAME: temperature,
+                _TIMESTAMP_FIELD_NAME: start_time + datetime.timedelta(minutes=i),
+            }
+            for i, temperature in enumerate(temperature_readings)
         ]
         return mocker.patch.object(
             module, "collect_data_to_csv", side_effect=sensor_data_sequence
@@ -103,115 +107,188 @@ class TestWaitForEquilibration:
             module, "_is_field_equilibrated", side_effect=return_sequence
         )
 
-    def test_checks_equilibration_on_all_readings(
+    @staticmethod
+    def _wait_for_equilibration(calibration_configuration, min_stable_time):
+        return module._wait_for_equilibration(
+            calibration_configuration,
+            sentinel.setpoint_data,
+            sentinel.equilibration_status,
+            _YSI_TEMPERATURE_FIELD_NAME,
+            sentinel.max_variation,
+            min_stable_time,
+        )
+
+    def test_checks_equilibration_on_all_readings_within_stable_time(
         self, mocker, mock_sleep, mock_check_status
     ):
-        temperature_readings = (
-            sentinel.temperature_reading_one,
-            sentinel.temperature_reading_two,
-        )
-        is_field_equilibrated_sequence = (False, True)
+        temperature_readings = (10.1, 10.2, 10.3)
+        is_field_equilibrated_sequence = (False, False, True)
 
         self._mock_collect_data_to_csv(mocker, temperature_readings)
         mock_is_field_equilibrated = self._mock_is_field_equilibrated(
             mocker, is_field_equilibrated_sequence
         )
 
-        calibration_configuration = Mock(com_ports=sentinel.com_ports)
+        calibration_configuration = Mock(
+            com_ports=sentinel.com_ports, equilibration_collection_interval=5
+        )
 
-        module._wait_for_equilibration(
-            calibration_configuration,
-            sentinel.setpoint,
-            sentinel.loop_count,
-            sentinel.equilibration_status,
-            sentinel.field_name,
-            sentinel.max_variation,
-            sentinel.min_stable_time,
+        self._wait_for_equilibration(
+            calibration_configuration, datetime.timedelta(minutes=5)
         )
 
         assert mock_is_field_equilibrated.call_count == len(temperature_readings)
 
         # make sure it is checking for equilibration on the full set of readings
-        # fmt: off
-        last_is_field_equilibrated_call_args = mock_is_field_equilibrated.call_args_list[-1][0]
-        # fmt: on
-        final_sensor_data_log = last_is_field_equilibrated_call_args[0]
-        row_count = final_sensor_data_log.shape[0]
-        assert row_count == len(temperature_readings)
+        timestamps, values, _, _ = mock_is_field_equilibrated.call_args[0]
+        assert list(values) == list(temperature_readings)
+        assert len(timestamps) == len(temperature_readings)
 
-    def test_calls_collect_data_to_csv_and_check_status(
+    def test_drops_readings_older_than_stable_time(
         self, mocker, mock_sleep, mock_check_status
     ):
-        temperature_readings = (sentinel.temperature_reading_one,)
-        is_field_equilibrated_sequence = (True,)
+        temperature_readings = (10.1, 10.2, 10.3, 10.4)
+        self._mock_collect_data_to_csv(mocker, temperature_readings)
+        mock_is_field_equilibrated = self._mock_is_field_equilibrated(
+            mocker, (False, False, False, True)
+        )
 
-        mock_collect_data_to_csv = self._mock_collect_data_to_csv(
-            mocker, temperature_readings
+        self._wait_for_equilibration(
+            Mock(com_ports=sentinel.com_ports, equilibration_collection_interval=5),
+            datetime.timedelta(minutes=2),
         )
-        self._mock_is_field_equilibrated(mocker, is_field_equilibrated_sequence)
 
-        calibration_configuration = Mock(com_ports=sentinel.com_ports)
+        # Readings are a minute apart: the oldest reading kept is exactly min_stable_time before the newest
+        timestamps, values, _, _ = mock_is_field_equilibrated.call_args[0]
+        assert list(values) == [10.2, 10.3, 10.4]
+        assert timestamps[-1] - timestamps[0] == datetime.timedelta(minutes=2)
 
-        module._wait_for_equilibration(
-            calibration_configuration,
-            sentinel.setpoint,
-            sentinel.loop_count,
-            sentinel.equilibration_status,
-            sentinel.field_name,
-            sentinel.max_variation,
-            sentinel.min_stable_time,
+    def test_returns_last_reading(self, mocker, mock_sleep, mock_check_status):
+        self._mock_collect_data_to_csv(mocker, (10.1, 10.2))
+        self._mock_is_field_equilibrated(mocker, (False, True))
+
+        last_reading = self._wait_for_equilibration(
+            Mock(com_ports=sentinel.com_ports, equilibration_collection_interval=5),
+            datetime.timedelta(minutes=5),
+        )
+
+        assert last_reading[_YSI_TEMPERATURE_FIELD_NAME] == 10.2
+
+    def test_sleeps_until_next_collection_time(
+        self, mocker, mock_sleep, mock_check_status
+    ):
+        self._mock_collect_data_to_csv(mocker, (10.1, 10.2))
+        self._mock_is_field_equilibrated(mocker, (False, True))
+        # Collecting the first row takes 2 seconds
+        mocker.patch.object(module, "monotonic", side_effect=[100, 102])
+
+        self._wait_for_equilibration(
+            Mock(com_ports=sentinel.com_ports, equilibration_collection_interval=5),
+            datetime.timedelta(minutes=5),
+        )
+
+        mock_sleep.assert_called_once_with(3)
+
+    def test_does_not_catch_up_after_a_slow_collection(
+        self, mocker, mock_sleep, mock_check_status
+    ):
+        self._mock_collect_data_to_csv(mocker, (10.1, 10.2, 10.3))
+        self._mock_is_field_equilibrated(mocker, (False, False, True))
+        # Collecting the first row takes 12 seconds (over two intervals), and the second takes 2 seconds
+        mocker.patch.object(module, "monotonic", side_effect=[100, 112, 114])
+
+        self._wait_for_equilibration(
+            Mock(com_ports=sentinel.com_ports, equilibration_collection_interval=5),
+            datetime.timedelta(minutes=5),
+        )
+
+        # The second collection starts right away, but the third still waits for a full interval after it
+        assert mock_sleep.call_args_list == [call(0), call(3)]
+
+    def test_calls_collect_data_to_csv_and_check_status(
+        self, mocker, mock_sleep, mock_check_status
+    ):
+        mock_collect_data_to_csv = self._mock_collect_data_to_csv(mocker, (10.1,))
+        mocker.patch.object(
+            module, "get_gas_mixer_status", return_value=sentinel.gas_mixer_status
+        )
+        self._mock_is_field_equilibrated(mocker, (True,))
+
+        calibration_configuration = Mock(
+            com_ports=sentinel.com_ports, equilibration_collection_interval=5
+        )
+
+        self._wait_for_equilibration(
+            calibration_configuration, datetime.timedelta(minutes=5)
         )
 
         mock_collect_data_to_csv.assert_called_with(
-            sentinel.setpoint,
+            sentinel.setpoint_data,
             calibration_configuration,
-            loop_count=sentinel.loop_count,
             equilibration_status=sentinel.equilibration_status,
         )
-        mock_check_status.assert_called_with(calibration_configuration.com_ports)
+        mock_check_status.assert_called_with(
+            calibration_configuration.com_ports,
+            gas_mixer_status=sentinel.gas_mixer_status,
+        )
 
 
 class TestWaitForTemperatureEquilibration:
     def test_calls_wait_for_equilibration(self, mocker):
-        sensor_data = pd.DataFrame(
-            {_YSI_TEMPERATURE_FIELD_NAME: [sentinel.ysi_temperature_value]}
-        )
+        sensor_data = {_YSI_TEMPERATURE_FIELD_NAME: sentinel.ysi_temperature_value}
         mock_wait_for_equilibration = mocker.patch.object(
             module, "_wait_for_equilibration", return_value=sensor_data
         )
 
         module.wait_for_temperature_equilibration(
-            sentinel.calibration_configuration, sentinel.setpoint, sentinel.loop_count
+            sentinel.calibration_configuration, sentinel.setpoint_data
         )
 
         mock_wait_for_equilibration.assert_called_with(
             sentinel.calibration_configuration,
-            sentinel.setpoint,
-            sentinel.loop_count,
+            sentinel.setpoint_data,
             EquilibrationStatus.TEMPERATURE,
             _YSI_TEMPERATURE_FIELD_NAME,
             module._TEMPERATURE_MAXIMUM_EQUILIBRATED_VARIATION,
             module._TEMPERATURE_MINIMUM_STABLE_TIME,
         )
 
+    def test_calls_wait_for_equilibration_with_provided_stable_time(self, mocker):
+        sensor_data = {_YSI_TEMPERATURE_FIELD_NAME: sentinel.ysi_temperature_value}
+        mock_wait_for_equilibration = mocker.patch.object(
+            module, "_wait_for_equilibration", return_value=sensor_data
+        )
+
+        module.wait_for_temperature_equilibration(
+            sentinel.calibration_configuration,
+            sentinel.setpoint_data,
+            min_stable_time=sentinel.min_stable_time,
+        )
+
+        mock_wait_for_equilibration.assert_called_with(
+            sentinel.calibration_configuration,
+            sentinel.setpoint_data,
+            EquilibrationStatus.TEMPERATURE,
+            _YSI_TEMPERATURE_FIELD_NAME,
+            module._TEMPERATURE_MAXIMUM_EQUILIBRATED_VARIATION,
+            sentinel.min_stable_time,
+        )
+
 
 class TestWaitForDoEquilibration:
     def test_calls_wait_for_equilibration(self, mocker):
-        sensor_data = pd.DataFrame(
-            {_YSI_DO_MMHG_FIELD_NAME: [sentinel.ysi_do_mmhg_value]}
-        )
+        sensor_data = {_YSI_DO_MMHG_FIELD_NAME: sentinel.ysi_do_mmhg_value}
         mock_wait_for_equilibration = mocker.patch.object(
             module, "_wait_for_equilibration", return_value=sensor_data
         )
 
         module.wait_for_do_equilibration(
-            sentinel.calibration_configuration, sentinel.setpoint, sentinel.loop_count
+            sentinel.calibration_configuration, sentinel.setpoint_data
         )
 
         mock_wait_for_equilibration.assert_called_with(
             sentinel.calibration_configuration,
-            sentinel.setpoint,
-            sentinel.loop_count,
+            sentinel.setpoint_data,
             EquilibrationStatus.DO,
             _YSI_DO_MMHG_FIELD_NAME,
             module._DO_MAXIMUM_EQUILIBRATED_VARIATION_MMHG,
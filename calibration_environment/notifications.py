@@ -1,10 +1,20 @@
+import logging
 import os
+import queue
+import threading
 
 import slack
 
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_SLACK_CHANNEL = "#water-bath-funtimes"
 
+# Messages waiting to be posted by the background notification thread
+_message_queue: queue.Queue = queue.Queue()
+_message_thread = None
+_message_thread_lock = threading.Lock()
+
 
 def post_slack_message(message: str, mention_channel: bool = False):
     """ Posts a message as the "Calibration Environment Bot" using the "CalibrationNotify" app
@@ -23,3 +33,59 @@ def post_slack_message(message: str, mention_channel: bool = False):
         channel=DEFAULT_SLACK_CHANNEL, text=f"{mention}{message}"
     )
     assert response["ok"]
+
+
+def _post_queued_messages():
+    while True:
+        queued_item = _message_queue.get()
+
+        if isinstance(queued_item, threading.Event):
+            # Flush marker: everything queued before it has been posted
+            queued_item.set()
+            continue
+
+        message, mention_channel = queued_item
+        try:
+            post_slack_message(message, mention_channel=mention_channel)
+        except Exception:
+            # Don't let a single failed post take down the notification thread
+            logger.exception(f'Failed to post slack message "{message}"')
+
+
+def _ensure_message_thread_started():
+    global _message_thread
+
+    with _message_thread_lock:
+        if _message_thread is None:
+            _message_thread = threading.Thread(
+                target=_post_queued_messages, name="slack-notifications", daemon=True
+            )
+            _message_thread.start()
+
+
+def post_slack_message_async(message: str, mention_channel: bool = False):
+    """ Queue a slack message to be posted by a background thread, so that callers don't block on the Slack API.
+    Messages are posted in the order they are queued. Use flush_slack_messages() to wait for them to be sent.
+
+    Args:
+        message: The message contents
+        mention_channel: whether to mention @channel in the message
+    """
+    _ensure_message_thread_started()
+    _message_queue.put((message, mention_channel))
+
+
+def flush_slack_messages(timeout: float = None) -> bool:
+    """ Wait for all messages queued with post_slack_message_async() to be posted
+
+    Args:
+        timeout: maximum time to wait, in seconds. Default: wait indefinitely
+
+    Returns:
+        True if all queued messages were posted, False if the timeout elapsed first
+    """
+    _ensure_message_thread_started()
+
+    flushed = threading.Event()
+    _message_queue.put(flushed)
+    return flushed.wait(timeout)
@@ -0,0 +1,33 @@
+from unittest.mock import call
+
+import pytest
+
+from . import notifications as module
+
+
+@pytest.fixture
+def mock_post_slack_message(mocker):
+    return mocker.patch.object(module, "post_slack_message")
+
+
+class TestPostSlackMessageAsync:
+    def test_posts_queued_messages_in_order(self, mock_post_slack_message):
+        module.post_slack_message_async("first")
+        module.post_slack_message_async("second", mention_channel=True)
+
+        assert module.flush_slack_messages(timeout=5)
+
+        mock_post_slack_message.assert_has_calls(
+            [call("first", mention_channel=False), call("second", mention_channel=True)]
+        )
+
+    def test_keeps_posting_after_failed_post(self, mocker, mock_post_slack_message):
+        mocker.patch.object(module, "logger")
+        mock_post_slack_message.side_effect = [Exception("Mock error"), None]
+
+        module.post_slack_message_async("first")
+        module.post_slack_message_async("second")
+
+        assert module.flush_slack_messages(timeout=5)
+
+        assert mock_post_slack_message.call_count == 2
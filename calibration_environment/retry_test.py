@@ -35,7 +35,7 @@ class TestRetryOnException:
 
         tries = 0  # we used one up just now; reset it
 
-        decorator = module.retry_on_exception(CustomException, interval=0.1)
+        decorator = module.retry_on_exception(CustomException, interval=0)
         wrapped_fn = decorator(unreliable_function)
         assert wrapped_fn(sentinel.happiness) == sentinel.happiness
 
@@ -43,7 +43,7 @@ class TestRetryOnException:
         def always_broken():
             raise CustomException
 
-        decorator = module.retry_on_exception(CustomException, interval=0.1)
+        decorator = module.retry_on_exception(CustomException, interval=0)
         wrapped_fn = decorator(always_broken)
 
         with pytest.raises(CustomException):
@@ -1,38 +1,59 @@
 import sys
 import logging
 import time
-from datetime import datetime, timedelta
-
-import pandas as pd
+from datetime import datetime
 
 from . import cosmobot
 from .configure import get_calibration_configuration
-from .data_logging import collect_data_to_csv
+from .data_logging import (
+    collect_data_to_csv,
+    get_setpoint_data,
+    get_gas_mixer_status,
+    flush_csv_rows,
+    close_csv_file,
+)
 from .drivers import gas_mixer, water_bath
-from .equilibrate import wait_for_temperature_equilibration, wait_for_do_equilibration
-from .notifications import post_slack_message
+from .equilibrate import (
+    wait_for_temperature_equilibration,
+    _TEMPERATURE_CONFIRMATION_STABLE_TIME,
+    wait_for_do_equilibration,
+)
+from .notifications import (
+    post_slack_message,
+    post_slack_message_async,
+    flush_slack_messages,
+)
 from .status import check_status
 
+logger = logging.getLogger(__name__)
+
+# How long to wait for queued slack notifications to go out before shutting down
+_SLACK_FLUSH_TIMEOUT_SECONDS = 30
+
+# Minimum time between status checks while holding at a setpoint. Status rarely changes between samples, and each
+# check costs extra serial round-trips to the gas mixer and water bath.
+_STATUS_CHECK_INTERVAL_SECONDS = 60
+
 
 def _shut_down(gas_mixer_com_port, water_bath_com_port):
     """Turn off gas mixer and water bath"""
-    logging.info("Shutting down gas mixer and temperature controlled water bath.")
+    logger.info("Shutting down gas mixer and temperature controlled water bath.")
     try:
-        logging.info("Shutting down gas mixer...")
+        logger.info("Shutting down gas mixer...")
         gas_mixer.stop_flow_with_retry(gas_mixer_com_port)
-        logging.info("Gas mixer flow stopped.")
+        logger.info("Gas mixer flow stopped.")
     finally:
         # Ensure that the water bath gets turned off even if the gas mixer errors
 
         # If the water bath was _just_ turned on immediately before this, turning it off doesn't work unless we wait
         # a few seconds.
-        logging.info("Giving the water bath 5 seconds before we shut it off...")
+        logger.info("Giving the water bath 5 seconds before we shut it off...")
         time.sleep(5)
-        logging.info("Shutting down water bath.")
+        logger.info("Shutting down water bath.")
         water_bath.send_settings_command_and_parse_response(
             water_bath_com_port, unit_on_off=False
         )
-        logging.info("Water bath shut down.")
+        logger.info("Water bath shut down.")
 
 
 def run(cli_args=None):
@@ -49,8 +70,8 @@ def run(cli_args=None):
     # Parse the configuration parameters from cli args
     calibration_configuration = get_calibration_configuration(cli_args, start_date)
 
-    logging.info(
-        f"Logging sensor data to {calibration_configuration.output_csv_filepath}"
+    logger.info(
+        "Logging sensor data to %s", calibration_configuration.output_csv_filepath
     )
 
     water_bath_com_port = calibration_configuration.com_ports["water_bath"]
@@ -67,34 +88,51 @@ def run(cli_args=None):
         water_bath.initialize(water_bath_com_port)
 
         loop_count = 0
+        last_status_check_time = None
+
+        # Iterate plain dicts rather than DataFrame.iterrows(), which builds a pd.Series for every row
+        setpoints = calibration_configuration.setpoints.to_dict(orient="records")
 
         while True:
+            # Always equilibrate temperature at the start of each pass through the sequence
+            last_setpoint_temperature = None
 
-            for i, setpoint in calibration_configuration.setpoints.iterrows():
-                last_setpoint = (
-                    calibration_configuration.setpoints.iloc[i - 1] if i > 0 else None
+            for setpoint in setpoints:
+                setpoint_temperature = setpoint["temperature"]
+
+                # Use lazy %-style args so that nothing is formatted unless INFO logging is enabled
+                logger.info(
+                    "Setting setpoint: temperature=%s, flow_rate_slpm=%s, o2_fraction=%s, hold_time=%s",
+                    setpoint_temperature,
+                    setpoint["flow_rate_slpm"],
+                    setpoint["o2_fraction"],
+                    setpoint["hold_time"],
+                )
+                # These fields are the same for every row of data logged at this setpoint
+                setpoint_data = get_setpoint_data(
+                    setpoint, calibration_configuration, loop_count
                 )
 
-                logging.info(f"Setting setpoint: {setpoint.to_dict()}")
                 water_bath.send_command_and_parse_response(
                     water_bath_com_port,
                     command_name="Set Setpoint",
-                    data=setpoint["temperature"],
+                    data=setpoint_temperature,
                 )
 
                 # only wait for temperature equilibration if temperature
                 # changed from last setpoint
                 if (
-                    last_setpoint is None
-                    or last_setpoint["temperature"] != setpoint["temperature"]
+                    last_setpoint_temperature is None
+                    or last_setpoint_temperature != setpoint_temperature
                 ):
                     # Stop gas mixer while we wait for temperature equilibration to conserve gas
                     gas_mixer.stop_flow_with_retry(gas_mixer_com_port)
                     wait_for_temperature_equilibration(
-                        calibration_configuration, setpoint, loop_count
+                        calibration_configuration, setpoint_data
                     )
 
-                    # Resume gas flow and ensure temperature remains equilibrated
+                    # Resume gas flow and ensure temperature remains equilibrated. Temperature was just stable,
+                    # so only a short confirmation window is needed rather than a full equilibration wait.
                     gas_mixer.start_constant_flow_mix_with_retry(
                         gas_mixer_com_port,
                         setpoint["flow_rate_slpm"],
@@ -102,7 +140,9 @@ def run(cli_args=None):
                         calibration_configuration.o2_source_gas_fraction,
                     )
                     wait_for_temperature_equilibration(
-                        calibration_configuration, setpoint, loop_count
+                        calibration_configuration,
+                        setpoint_data,
+                        min_stable_time=_TEMPERATURE_CONFIRMATION_STABLE_TIME,
                     )
 
                 # Set the gas mixer ratio
@@ -112,15 +152,12 @@ def run(cli_args=None):
                     setpoint["o2_fraction"],
                     calibration_configuration.o2_source_gas_fraction,
                 )
-                wait_for_do_equilibration(
-                    calibration_configuration, setpoint, loop_count
-                )
+                wait_for_do_equilibration(calibration_configuration, setpoint_data)
 
-                # use pd.Timedelta here for type safety (handles numpy ints)
-                setpoint_hold_end_time = datetime.now() + pd.Timedelta(
-                    seconds=setpoint["hold_time"]
-                )
-                next_data_collection_time = datetime.now()
+                # Monotonic float seconds: cheap to compare and immune to wall-clock jumps.
+                # float() for type safety (handles numpy ints)
+                setpoint_hold_end_time = time.monotonic() + float(setpoint["hold_time"])
+                next_data_collection_time = time.monotonic()
 
                 if calibration_configuration.capture_images:
                     # start image capture on cosmobots
@@ -134,29 +171,45 @@ def run(cli_args=None):
                         for cosmobot_ssh_client in cosmobot_ssh_clients
                     ]
 
-                while datetime.now() < setpoint_hold_end_time:
-                    # Wait before collecting next datapoint
-                    if datetime.now() < next_data_collection_time:
-                        time.sleep(0.1)  # No need to totally peg the CPU
+                while time.monotonic() < setpoint_hold_end_time:
+                    now = time.monotonic()
+                    # Sleep until the next datapoint is due (or the hold ends)
+                    if now < next_data_collection_time:
+                        time.sleep(
+                            min(next_data_collection_time, setpoint_hold_end_time) - now
+                        )
                         continue
 
-                    next_data_collection_time = next_data_collection_time + timedelta(
-                        seconds=calibration_configuration.collection_interval
+                    next_data_collection_time += (
+                        calibration_configuration.collection_interval
                     )
 
-                    collect_data_to_csv(
-                        setpoint, calibration_configuration, loop_count=loop_count
-                    )
-                    check_status(calibration_configuration.com_ports)
+                    row = collect_data_to_csv(setpoint_data, calibration_configuration)
+
+                    if (
+                        last_status_check_time is None
+                        or time.monotonic() - last_status_check_time
+                        > _STATUS_CHECK_INTERVAL_SECONDS
+                    ):
+                        # Check the gas mixer status we just read rather than querying the gas mixer again
+                        check_status(
+                            calibration_configuration.com_ports,
+                            gas_mixer_status=get_gas_mixer_status(row),
+                        )
+                        last_status_check_time = time.monotonic()
+
+                flush_csv_rows(calibration_configuration.output_csv_filepath)
 
                 if calibration_configuration.capture_images:
                     # Wait for all run_experiment processes to complete (raises if any have a bad exit code)
-                    logging.info(
+                    logger.info(
                         "Waiting for run_experiment on cosmobot(s) to complete..."
                     )
                     for experiment_streams in running_experiments:
                         cosmobot.wait_for_exit(experiment_streams)
-                    logging.info("All cosmobot run_experiment processes completed")
+                    logger.info("All cosmobot run_experiment processes completed")
+
+                last_setpoint_temperature = setpoint_temperature
 
             # Increment so we know which iteration we're on in the logs
             loop_count += 1
@@ -167,25 +220,36 @@ def run(cli_args=None):
     # Catch interrupts and unexpected errors so we can notify on slack.
     # Re-raise so that we still get the stack traces
     except KeyboardInterrupt as e:
-        logging.warning("Keyboard interrupt! Shutting down... (please wait)")
-        post_slack_message("Calibration routine ended by user.")
+        logger.warning("Keyboard interrupt! Shutting down... (please wait)")
+        post_slack_message_async("Calibration routine ended by user.")
         raise e
 
     except Exception as e:
-        logging.warning("Unexpected error! Shutting down... (please wait)")
-        post_slack_message(
+        logger.warning("Unexpected error! Shutting down... (please wait)")
+        post_slack_message_async(
             f"Calibration routine ended with error! {e}", mention_channel=True
         )
         raise e
 
     else:
-        post_slack_message("Calibration routine ended successfully!")
+        post_slack_message_async("Calibration routine ended successfully!")
 
     # Ensure gas mixer and water bath get turned off regardless of any unexpected errors
     finally:
-        if calibration_configuration.capture_images:
-            for cosmobot_ssh_client in cosmobot_ssh_clients:
-                cosmobot.attempt_to_close_connection(cosmobot_ssh_client)
-
-        _shut_down(gas_mixer_com_port, water_bath_com_port)
-        post_slack_message("Calibration system shut down.")
+        try:
+            try:
+                if calibration_configuration.capture_images:
+                    for cosmobot_ssh_client in cosmobot_ssh_clients:
+                        cosmobot.attempt_to_close_connection(cosmobot_ssh_client)
+
+                _shut_down(gas_mixer_com_port, water_bath_com_port)
+            finally:
+                # Make sure queued notifications (e.g. "ended with error") go out even if shutting down fails, since
+                # the notification thread dies with the process. This also keeps them in order with the final one.
+                flush_slack_messages(timeout=_SLACK_FLUSH_TIMEOUT_SECONDS)
+
+            post_slack_message("Calibration system shut down.")
+        finally:
+            # Don't lose any buffered data, even on errors or interrupts.
+            # Do this last so that an error writing the file can't keep the hardware from being shut down.
+            close_csv_file(calibration_configuration.output_csv_filepath)
@@ -1,5 +1,5 @@
 import time
-from unittest.mock import sentinel, call
+from unittest.mock import ANY, sentinel, call
 
 import pytest
 import pandas as pd
@@ -10,21 +10,26 @@ from . import run as module
 
 @pytest.fixture
 def mock_drivers(mocker):
-    mocker.patch.object(module.gas_mixer, "start_constant_flow_mix_with_retry")
-    mocker.patch.object(module.gas_mixer, "stop_flow_with_retry")
-    mocker.patch.object(module.gas_mixer, "get_mixer_status_with_retry")
-    mocker.patch.object(module.gas_mixer, "get_gas_ids_with_retry")
+    mocker.patch.multiple(
+        module.gas_mixer,
+        start_constant_flow_mix_with_retry=mocker.DEFAULT,
+        stop_flow_with_retry=mocker.DEFAULT,
+        get_mixer_status_with_retry=mocker.DEFAULT,
+        get_gas_ids_with_retry=mocker.DEFAULT,
+    )
 
-    mocker.patch.object(module.water_bath, "send_command_and_parse_response")
-    mocker.patch.object(module.water_bath, "initialize")
-    mocker.patch.object(module.water_bath, "send_settings_command_and_parse_response")
+    mocker.patch.multiple(
+        module.water_bath,
+        send_command_and_parse_response=mocker.DEFAULT,
+        initialize=mocker.DEFAULT,
+        send_settings_command_and_parse_response=mocker.DEFAULT,
+    )
 
 
 @pytest.fixture
 def mock_get_all_sensor_data(mocker):
     return mocker.patch(
-        "calibration_environment.data_logging.get_all_sensor_data",
-        return_value=pd.Series(),
+        "calibration_environment.data_logging.get_all_sensor_data", return_value={},
     )
 
 
@@ -45,14 +50,29 @@ def mock_wait_for_do_equilibration(mocker):
 
 @pytest.fixture
 def mock_wait_for_equilibration(
-    mock_wait_for_temperature_equilibration, mock_wait_for_do_equilibration
+    mock_wait_for_temperature_equilibration, mock_wait_for_do_equilibration,
 ):
     pass
 
 
+class FakeTime:
+    """ Stands in for the time module: sleep() advances monotonic() instantly instead of actually sleeping """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleep_count = 0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.sleep_count += 1
+
+
 @pytest.fixture
-def mock_output_filepath(tmp_path):
-    return tmp_path / "test.csv"
+def mock_time(mocker):
+    return mocker.patch.object(module, "time", FakeTime())
 
 
 @pytest.fixture
@@ -61,7 +81,12 @@ def mock_shut_down(mocker):
 
 
 DEFAULT_SETPOINTS = pd.DataFrame(
-    [{"temperature": 15, "flow_rate_slpm": 2.5, "o2_fraction": 50, "hold_time": 0.01}]
+    {
+        "temperature": [15],
+        "flow_rate_slpm": [2.5],
+        "o2_fraction": [50],
+        "hold_time": [0.01],
+    }
 )
 
 
@@ -73,12 +98,27 @@ DEFAULT_CONFIGURATION = CalibrationConfiguration(
     loop=False,
     output_csv_filepath="test.csv",
     collection_interval=0.01,
+    equilibration_collection_interval=0.01,
     cosmobot_experiment_name=None,
     cosmobot_hostnames=None,
     cosmobot_exposure_time=None,
     capture_images=False,
 )
 
+# What DEFAULT_CONFIGURATION writes to the output csv (minus timestamps) when the sensors return {"stub data": 1}
+EXPECTED_CSV = pd.DataFrame(
+    {
+        "equilibration status": ["equilibrated"],
+        "loop count": [0],
+        "o2 source gas fraction": [0.21],
+        "setpoint O2 fraction": [50],
+        "setpoint flow rate (SLPM)": [2.5],
+        "setpoint hold time seconds": [0.01],
+        "setpoint temperature (C)": [15],
+        "stub data": [1],
+    }
+)
+
 
 @pytest.fixture
 def mock_get_calibration_configuration(mocker, mock_output_filepath):
@@ -97,6 +137,16 @@ def mock_post_slack_message(mocker):
     return mocker.patch.object(module, "post_slack_message")
 
 
+@pytest.fixture
+def mock_post_slack_message_async(mocker):
+    return mocker.patch.object(module, "post_slack_message_async")
+
+
+@pytest.fixture
+def mock_flush_slack_messages(mocker):
+    return mocker.patch.object(module, "flush_slack_messages")
+
+
 @pytest.fixture
 def mock_cosmobot_module(mocker):
     return mocker.patch.object(module, "cosmobot")
@@ -111,6 +161,8 @@ def mock_all_integrations(
     mock_wait_for_equilibration,
     mock_shut_down,
     mock_post_slack_message,
+    mock_post_slack_message_async,
+    mock_flush_slack_messages,
 ):
     # This pytest fixture just combines all other fixtures into one so that our
     # test function signatures don't explode with repetitive mocks
@@ -123,88 +175,101 @@ class TestRunCalibration:
         mock_output_filepath,
         mock_get_calibration_configuration,
         mock_all_integrations,
+        mock_time,
     ):
         """
-        Test is configured to hold at setpoint for 0.2 seconds, and read data
-        every 0.09 seconds. 0.09 is used instead of 0.1 to allow some wiggle room.
+        Test is configured to hold at setpoint for 5 minutes, and read data
+        every minute (at 0, 1, 2, 3 and 4 minutes). Uses a fake clock, so no time actually passes.
         """
-        setpoint_hold_time = 0.2
-        data_collection_interval = 0.09
-
-        setpoints = pd.DataFrame(
-            [
-                {
-                    "temperature": 15,
-                    "flow_rate_slpm": 2.5,
-                    "o2_fraction": 50,
-                    "hold_time": setpoint_hold_time,
-                }
-            ]
-        )
+        setpoint_hold_time = 300
+        data_collection_interval = 60
 
         mock_get_calibration_configuration.return_value = DEFAULT_CONFIGURATION._replace(
-            setpoints=setpoints,
+            setpoints=DEFAULT_SETPOINTS.assign(hold_time=setpoint_hold_time),
             collection_interval=data_collection_interval,
             output_csv_filepath=mock_output_filepath,
         )
 
         module.run([])
 
-        output_csv = pd.read_csv(mock_output_filepath)
+        # Only the row count matters here, so just count lines rather than parsing the csv
+        with open(mock_output_filepath) as output_csv:
+            output_row_count = sum(1 for _ in output_csv) - 1  # Don't count the header
 
-        expected_output_rows = setpoint_hold_time // data_collection_interval
-        assert len(output_csv) == expected_output_rows
+        expected_output_rows = 5
+        assert output_row_count == expected_output_rows
+        # The hold loop should sleep right up to each collection rather than polling
+        assert mock_time.sleep_count == expected_output_rows
 
     def test_correct_values_saved_to_csv(
         self, mock_all_integrations, mock_output_filepath, mock_get_all_sensor_data
     ):
-
-        expected_csv = pd.DataFrame(
-            [
-                {
-                    "equilibration status": "equilibrated",
-                    "loop count": 0,
-                    "o2 source gas fraction": 0.21,
-                    "setpoint O2 fraction": 50.0,
-                    "setpoint flow rate (SLPM)": 2.5,
-                    "setpoint hold time seconds": 0.01,
-                    "setpoint temperature (C)": 15.0,
-                    "stub data": 1,
-                }
-            ]
-        )
-
-        mock_get_all_sensor_data.return_value = pd.Series({"data": 1}).add_prefix(
-            "stub "
-        )
+        mock_get_all_sensor_data.return_value = {"stub data": 1}
 
         module.run([])
 
         output_csv = pd.read_csv(mock_output_filepath).drop(columns=["timestamp"])
 
-        pd.testing.assert_frame_equal(expected_csv, output_csv)
+        pd.testing.assert_frame_equal(EXPECTED_CSV, output_csv)
 
     def test_checks_status(self, mock_all_integrations, mock_check_status):
         module.run([])
 
         mock_check_status.assert_called()
 
+    def test_debounces_status_checks_during_hold(
+        self,
+        mock_all_integrations,
+        mock_get_calibration_configuration,
+        mock_output_filepath,
+        mock_check_status,
+        mock_time,
+    ):
+        mock_get_calibration_configuration.return_value = DEFAULT_CONFIGURATION._replace(
+            setpoints=DEFAULT_SETPOINTS.assign(hold_time=0.05),
+            collection_interval=0.01,
+            output_csv_filepath=mock_output_filepath,
+        )
+
+        module.run([])
+
+        mock_check_status.assert_called_once()
+
     def test_shuts_down_at_end(self, mock_all_integrations, mock_shut_down):
         module.run([])
 
         mock_shut_down.assert_called()
 
     def test_notifies_on_successful_end(
-        self, mock_all_integrations, mock_post_slack_message
+        self,
+        mock_all_integrations,
+        mock_post_slack_message,
+        mock_post_slack_message_async,
     ):
         module.run([])
 
-        mock_post_slack_message.assert_has_calls(
-            [
-                call("Calibration routine ended successfully!"),
-                call("Calibration system shut down."),
-            ]
+        mock_post_slack_message_async.assert_called_once_with(
+            "Calibration routine ended successfully!"
         )
+        mock_post_slack_message.assert_called_once_with("Calibration system shut down.")
+
+    def test_flushes_queued_notifications_before_final_notification(
+        self, mocker, mock_all_integrations
+    ):
+        mock_notifications = mocker.Mock()
+        mocker.patch.object(
+            module, "flush_slack_messages", mock_notifications.flush_slack_messages
+        )
+        mocker.patch.object(
+            module, "post_slack_message", mock_notifications.post_slack_message
+        )
+
+        module.run([])
+
+        assert mock_notifications.mock_calls == [
+            call.flush_slack_messages(timeout=module._SLACK_FLUSH_TIMEOUT_SECONDS),
+            call.post_slack_message("Calibration system shut down."),
+        ]
 
     @pytest.mark.parametrize(
         "function_that_might_raise",
@@ -221,6 +286,7 @@ class TestRunCalibration:
         mock_all_integrations,
         mock_shut_down,
         mock_post_slack_message,
+        mock_post_slack_message_async,
         function_that_might_raise,
     ):
         mocker.patch.object(*function_that_might_raise).side_effect = Exception(
@@ -233,15 +299,33 @@ class TestRunCalibration:
             module.run([])
 
         mock_shut_down.assert_called()
-        mock_post_slack_message.assert_has_calls(
-            [
-                call(
-                    "Calibration routine ended with error! Mock error",
-                    mention_channel=True,
-                ),
-                call("Calibration system shut down."),
-            ]
+        mock_post_slack_message_async.assert_called_once_with(
+            "Calibration routine ended with error! Mock error", mention_channel=True
         )
+        mock_post_slack_message.assert_called_once_with("Calibration system shut down.")
+
+    def test_shuts_down_and_notifies_when_closing_csv_fails(
+        self, mocker, mock_all_integrations, mock_shut_down, mock_post_slack_message,
+    ):
+        mocker.patch.object(module, "close_csv_file").side_effect = OSError(
+            "Mock disk error"
+        )
+
+        with pytest.raises(OSError):
+            module.run([])
+
+        mock_shut_down.assert_called()
+        mock_post_slack_message.assert_called_once_with("Calibration system shut down.")
+
+    def test_flushes_queued_notifications_when_shut_down_fails(
+        self, mock_all_integrations, mock_shut_down, mock_flush_slack_messages
+    ):
+        mock_shut_down.side_effect = Exception("Mock shut down error")
+
+        with pytest.raises(Exception, match="Mock shut down error"):
+            module.run([])
+
+        mock_flush_slack_messages.assert_called_once()
 
     def test_shuts_down_and_notifies_after_keyboard_interrupt(
         self,
@@ -249,6 +333,7 @@ class TestRunCalibration:
         mock_wait_for_temperature_equilibration,
         mock_shut_down,
         mock_post_slack_message,
+        mock_post_slack_message_async,
     ):
         # Pick an arbitrary function to have a KeyboardInterrput
         mock_wait_for_temperature_equilibration.side_effect = KeyboardInterrupt()
@@ -259,20 +344,18 @@ class TestRunCalibration:
             module.run([])
 
         mock_shut_down.assert_called()
-        mock_post_slack_message.assert_has_calls(
-            [
-                call("Calibration routine ended by user."),
-                call("Calibration system shut down."),
-            ]
+        mock_post_slack_message_async.assert_called_once_with(
+            "Calibration routine ended by user."
         )
+        mock_post_slack_message.assert_called_once_with("Calibration system shut down.")
 
     @pytest.mark.parametrize(
         "setpoint_temperatures,expected_wait_call_count",
         (
-            # called twice at each temperature setpoint change, 4 times total
-            ((15, 25), 4),
-            # called twice on initial temperature equilibration, not at all when setpoint value is unchanged
-            ((15, 15), 2),
+            # called once at each temperature setpoint change, 2 times total
+            ((15, 25), 2),
+            # called once on initial temperature equilibration, not at all when setpoint value is unchanged
+            ((15, 15), 1),
         ),
     )
     def test_calls_wait_for_temperature_equilibration_only_if_temperature_changed(
@@ -286,16 +369,14 @@ class TestRunCalibration:
     ):
         hold_time = 0.01
         collection_interval = hold_time  # collect one data point per setpoint
+        setpoint_count = len(setpoint_temperatures)
         setpoints = pd.DataFrame(
-            [
-                {
-                    "temperature": setpoint_temperature,
-                    "flow_rate_slpm": sentinel.flow_rate_slpm,
-                    "o2_fraction": sentinel.o2_fraction,
-                    "hold_time": hold_time,
-                }
-                for setpoint_temperature in setpoint_temperatures
-            ]
+            {
+                "temperature": list(setpoint_temperatures),
+                "flow_rate_slpm": [sentinel.flow_rate_slpm] * setpoint_count,
+                "o2_fraction": [sentinel.o2_fraction] * setpoint_count,
+                "hold_time": [hold_time] * setpoint_count,
+            }
         )
 
         mock_get_calibration_configuration.return_value = DEFAULT_CONFIGURATION._replace(
@@ -306,10 +387,15 @@ class TestRunCalibration:
 
         module.run([])
 
-        assert (
-            mock_wait_for_temperature_equilibration.call_count
-            == expected_wait_call_count
-        )
+        # Temperature equilibration is confirmed (with a shorter stable time) each time gas flow is restarted
+        # after waiting
+        expected_calls = [
+            call(ANY, ANY),
+            call(
+                ANY, ANY, min_stable_time=module._TEMPERATURE_CONFIRMATION_STABLE_TIME,
+            ),
+        ] * expected_wait_call_count
+        assert mock_wait_for_temperature_equilibration.call_args_list == expected_calls
 
     def test_calls_cosmobot_operations_for_all_hostnames(
         self,
@@ -324,6 +410,7 @@ class TestRunCalibration:
             capture_images=True,
             cosmobot_hostnames=hostnames,
             cosmobot_experiment_name=sentinel.experiment_name,
+            output_csv_filepath=mock_output_filepath,
         )
 
         module.run([])
@@ -349,6 +436,7 @@ class TestRunCalibration:
             capture_images=True,
             cosmobot_hostnames=hostnames,
             cosmobot_experiment_name=sentinel.experiment_name,
+            output_csv_filepath=mock_output_filepath,
             cosmobot_exposure_time=sentinel.exposure_time,
         )
 
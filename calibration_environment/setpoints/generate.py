@@ -52,46 +52,49 @@ def generate_ordered_setpoints(
             DO (approx mmHg): partial pressure of DO (approximate mmHg)
     """
 
-    temperature_setpoints_low_to_high = np.linspace(
-        min_temperature, max_temperature, temperatures_setpoint_count
+    # Sort once in case min and max were passed in the wrong order; after that, reversing is just a slice
+    temperature_setpoints_low_to_high = np.sort(
+        np.linspace(min_temperature, max_temperature, temperatures_setpoint_count)
     )
-    temperature_setpoints = sorted(
-        temperature_setpoints_low_to_high, reverse=start_high_temperature
+    temperature_setpoints = (
+        temperature_setpoints_low_to_high[::-1]
+        if start_high_temperature
+        else temperature_setpoints_low_to_high
     )
 
-    do_setpoints = np.linspace(min_do_mmhg, max_do_mmhg, do_setpoint_count)
+    do_setpoints_low_to_high = np.sort(
+        np.linspace(min_do_mmhg, max_do_mmhg, do_setpoint_count)
+    )
+    do_setpoints_high_to_low = do_setpoints_low_to_high[::-1]
 
     # Every other temperature will have reversed DO setpoints to minimize equilibration time as we progress from one
     # temperature to the next. Set those up:
-    do_setpoints_for_even_indexed_temperatures = sorted(
-        do_setpoints, reverse=start_high_do
-    )
-    do_setpoints_for_odd_indexed_temperatures = sorted(
-        do_setpoints, reverse=not start_high_do
-    )
-
+    if start_high_do:
+        do_setpoints_for_even_indexed_temperatures = do_setpoints_high_to_low
+        do_setpoints_for_odd_indexed_temperatures = do_setpoints_low_to_high
+    else:
+        do_setpoints_for_even_indexed_temperatures = do_setpoints_low_to_high
+        do_setpoints_for_odd_indexed_temperatures = do_setpoints_high_to_low
+
+    # Every other temperature gets a reversed set of DO setpoints
+    do_setpoints_by_temperature = [
+        do_setpoints_for_even_indexed_temperatures
+        if temperature_index % 2 == 0
+        else do_setpoints_for_odd_indexed_temperatures
+        for temperature_index in range(len(temperature_setpoints))
+    ]
+
+    do_setpoints_column = np.concatenate(do_setpoints_by_temperature)
+
+    # Build whole columns at once rather than a dict per setpoint
     setpoints = pd.DataFrame(
-        [
-            # fmt: off
-            {
-                "temperature": temperature,
-                "DO (approx mmHg)": do
-            }
-            # fmt: on
-            for temperature_index, temperature in enumerate(temperature_setpoints)
-            # Every other temperature gets a reversed set of DO setpoints
-            for do in (
-                do_setpoints_for_even_indexed_temperatures
-                if temperature_index % 2 == 0
-                else do_setpoints_for_odd_indexed_temperatures
-            )
-        ]
-    )
-
-    # Calculate O2 fraction based on mmHg
-    # We include both because the calibration program expects a fraction, but mmHg is a little nicer for humans
-    setpoints["o2_fraction"] = (
-        setpoints["DO (approx mmHg)"] / AVERAGE_SYSTEM_PRESSURE_MMHG
+        {
+            "temperature": np.repeat(temperature_setpoints, do_setpoint_count),
+            "DO (approx mmHg)": do_setpoints_column,
+            # Calculate O2 fraction based on mmHg
+            # We include both because the calibration program expects a fraction, but mmHg is a little nicer for humans
+            "o2_fraction": do_setpoints_column / AVERAGE_SYSTEM_PRESSURE_MMHG,
+        }
     )
     return setpoints
 
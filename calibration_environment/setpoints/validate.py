@@ -1,3 +1,5 @@
+from typing import List
+
 import pandas as pd
 
 from calibration_environment.drivers.gas_mixer import get_mix_validation_errors
@@ -7,19 +9,22 @@ from calibration_environment.drivers.water_bath import (
 
 
 def _get_setpoint_validation_errors(
-    setpoint: pd.DataFrame, o2_source_gas_fraction: float
-) -> pd.Series:
+    flow_rate_slpm: float,
+    o2_fraction: float,
+    temperature: float,
+    o2_source_gas_fraction: float,
+) -> List:
 
     all_errors = get_mix_validation_errors(
-        setpoint["flow_rate_slpm"], o2_source_gas_fraction, setpoint["o2_fraction"]
-    ) + get_temperature_setpoint_validation_errors(setpoint["temperature"])
+        flow_rate_slpm, o2_source_gas_fraction, o2_fraction
+    ) + get_temperature_setpoint_validation_errors(temperature)
 
     return all_errors
 
 
 def get_validation_errors(
     setpoints: pd.DataFrame, o2_source_gas_o2_fraction: float
-) -> pd.DataFrame:
+) -> pd.Series:
     """ Run validation checks against all setpoints and return all errors
 
         Args:
@@ -27,13 +32,24 @@ def get_validation_errors(
             o2_source_gas_o2_fraction: A float specifying the O2 source gas O2 fraction
 
         Returns:
-            A DataFrame with setpoints containing errors where columns represent errors
-            and a True value indicates the setpoint has that error.
+            A Series with a list of error strings for each setpoint that has errors.
             The original DataFrame index is preserved.
     """
-    setpoint_errors = setpoints.apply(
-        _get_setpoint_validation_errors, axis=1, args=(o2_source_gas_o2_fraction,)
-    )
-
-    errors_present_selector = setpoint_errors.apply(lambda errors: len(errors) > 0)
-    return setpoint_errors[errors_present_selector]
+    # Zip over the columns rather than using DataFrame.apply(axis=1), which builds a Series for every row
+    # Collect indices in a list rather than keying a dict by them, so that rows sharing an index label aren't merged
+    error_indices = []
+    setpoint_errors = []
+    for index, flow_rate_slpm, o2_fraction, temperature in zip(
+        setpoints.index,
+        setpoints["flow_rate_slpm"],
+        setpoints["o2_fraction"],
+        setpoints["temperature"],
+    ):
+        errors = _get_setpoint_validation_errors(
+            flow_rate_slpm, o2_fraction, temperature, o2_source_gas_o2_fraction
+        )
+        if errors:
+            error_indices.append(index)
+            setpoint_errors.append(errors)
+
+    return pd.Series(setpoint_errors, index=error_indices, dtype=object)
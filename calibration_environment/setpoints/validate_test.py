@@ -21,3 +21,36 @@ class TestValidateSetpoints:
 
         assert len(invalid_setpoints) == 1
         assert set(invalid_setpoints.loc[0]) == expected_errors
+
+    def test_preserves_index_and_omits_valid_setpoints(self):
+        setpoints = pd.DataFrame(
+            {
+                "temperature": [15, 101],
+                "flow_rate_slpm": [2.5, 2.5],
+                "o2_fraction": [0.1, 0.1],
+            },
+            index=[5, 7],
+        )
+
+        invalid_setpoints = module.get_validation_errors(setpoints, 0.21)
+
+        assert list(invalid_setpoints.index) == [7]
+        assert invalid_setpoints.loc[7] == ["temperature > 100 C"]
+
+    def test_keeps_setpoints_with_duplicate_index_labels(self):
+        setpoints = pd.DataFrame(
+            {
+                "temperature": [101, 102],
+                "flow_rate_slpm": [2.5, 2.5],
+                "o2_fraction": [0.1, 0.1],
+            },
+            index=[0, 0],
+        )
+
+        invalid_setpoints = module.get_validation_errors(setpoints, 0.21)
+
+        assert list(invalid_setpoints.index) == [0, 0]
+        assert list(invalid_setpoints) == [
+            ["temperature > 100 C"],
+            ["temperature > 100 C"],
+        ]
@@ -7,6 +7,12 @@ from calibration_environment.constants import (
 )
 
 
+_X_AXIS_UPPER_PADDING = 1.1
+_X_AXIS_UPPER_LIMIT = (
+    OXYGEN_FRACTION_IN_ATMOSPHERE * ATMOSPHERIC_PRESSURE_MMHG * _X_AXIS_UPPER_PADDING
+)
+
+
 def visualize_setpoints_sequence(setpoints, title, **line_kwargs):
     if "setpoint order" in setpoints.columns:
         # If the setpoints have been explicitly ordered, indicate that.
@@ -16,19 +22,12 @@ def visualize_setpoints_sequence(setpoints, title, **line_kwargs):
         mode = "lines+markers"
         text = None  # type: ignore
 
-    x_axis_upper_padding = 1.1
-
     return px.line(
         setpoints,
         title=title,
         x="DO (approx mmHg)",
         y="temperature",
-        range_x=[
-            0,
-            OXYGEN_FRACTION_IN_ATMOSPHERE
-            * ATMOSPHERIC_PRESSURE_MMHG
-            * x_axis_upper_padding,
-        ],
+        range_x=[0, _X_AXIS_UPPER_LIMIT],
         text=text,
         **line_kwargs
     ).update_traces(
@@ -47,6 +46,8 @@ def visualize_multiple_setpoints_sequences(setpoints_sequences, title):
             for name, sequence in setpoints_sequences.items()
         ],
         sort=False,
+        # The original indexes are kept as "setpoint order"; plotting doesn't need a combined index
+        ignore_index=True,
     )
 
     return visualize_setpoints_sequence(
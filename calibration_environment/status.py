@@ -1,5 +1,7 @@
 import logging
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, List, Mapping
 
 import serial
 
@@ -8,6 +10,12 @@ from calibration_environment.drivers import gas_mixer, water_bath
 
 logger = logging.getLogger(__name__)
 
+# The gas mixer and water bath are on separate serial ports, so when the gas mixer has to be queried, the water bath is
+# checked in the background while the gas mixer is checked on the calling thread
+_status_check_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="status-check"
+)
+
 
 class CalibrationSequenceAbort(Exception):
     # Raised when one or more calibration systems is not good to go
@@ -25,12 +33,14 @@ def _get_and_log_any_exceptions(
     return []
 
 
-def check_status(com_ports: Dict[str, str]) -> None:
+def check_status(com_ports: Dict[str, str], gas_mixer_status: Mapping = None) -> None:
     """ Check that the calibration systems are good to go, raising CalibrationSequenceAbort if not
     Currently checks water bath status registers for warnings and errors, and gas mixer status for low feed pressure
 
     Args:
         com_ports: dict of gas_mixer and water_bath COM ports
+        gas_mixer_status: Optional. A gas mixer status that was just read (e.g. while collecting data), to check
+            instead of querying the gas mixer again. Default: query the gas mixer
 
     Returns: None
 
@@ -41,18 +51,8 @@ def check_status(com_ports: Dict[str, str]) -> None:
         Any traceback encountered at exception level, or a success message at debug level
 
     """
-    gas_mixer_exceptions = _get_and_log_any_exceptions(
-        "Gas mixer",
-        check_function=lambda: gas_mixer.assert_status_ok_with_retry(
-            com_ports["gas_mixer"]
-        ),
-        expected_exceptions=(
-            serial.SerialException,
-            gas_mixer.UnexpectedMixerResponse,
-            gas_mixer.GasMixerStatusError,
-        ),
-    )
-    water_bath_exceptions = _get_and_log_any_exceptions(
+    check_water_bath = partial(
+        _get_and_log_any_exceptions,
         "Water bath",
         check_function=lambda: water_bath.assert_status_ok(com_ports["water_bath"]),
         expected_exceptions=(
@@ -61,8 +61,35 @@ def check_status(com_ports: Dict[str, str]) -> None:
             water_bath.exceptions.WaterBathStatusError,
         ),
     )
+    check_gas_mixer = partial(
+        _get_and_log_any_exceptions,
+        "Gas mixer",
+        check_function=lambda: (
+            gas_mixer.assert_status_ok_with_retry(com_ports["gas_mixer"])
+            if gas_mixer_status is None
+            else gas_mixer.assert_mixer_status_ok(gas_mixer_status)
+        ),
+        expected_exceptions=(
+            serial.SerialException,
+            gas_mixer.UnexpectedMixerResponse,
+            gas_mixer.GasMixerStatusError,
+        ),
+    )
 
-    exceptions = gas_mixer_exceptions + water_bath_exceptions
+    if gas_mixer_status is not None:
+        # Checking a status we already have doesn't talk to the gas mixer, so there's nothing to overlap the water
+        # bath check with and no reason to hand it off to another thread
+        exceptions = check_gas_mixer() + check_water_bath()
+    else:
+        water_bath_exceptions_future = _status_check_executor.submit(check_water_bath)
+        try:
+            gas_mixer_exceptions = check_gas_mixer()
+        finally:
+            # Even if the gas mixer check raises something unexpected, don't leave the water bath check running
+            wait([water_bath_exceptions_future])
+
+        # .result() re-raises any unexpected exception from the water bath check
+        exceptions = gas_mixer_exceptions + water_bath_exceptions_future.result()
 
     if exceptions:
         raise CalibrationSequenceAbort(exceptions)
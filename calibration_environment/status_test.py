@@ -1,3 +1,4 @@
+import time
 from unittest.mock import sentinel, call
 
 import pytest
@@ -33,6 +34,30 @@ class TestCheckStatus:
         mock_logger.exception.assert_not_called()
         mock_logger.debug.assert_called_once_with("Clean status check")
 
+    def test_checks_provided_gas_mixer_status_without_querying_gas_mixer(
+        self, mocker, mock_logger, mock_status_checks
+    ):
+        mock_gas_mixer_status_check, mock_water_bath_status_check = mock_status_checks
+        mock_assert_mixer_status_ok = mocker.patch.object(
+            module.gas_mixer, "assert_mixer_status_ok"
+        )
+
+        module.check_status(MOCK_PORTS, gas_mixer_status=sentinel.gas_mixer_status)
+
+        mock_assert_mixer_status_ok.assert_called_once_with(sentinel.gas_mixer_status)
+        mock_gas_mixer_status_check.assert_not_called()
+        mock_water_bath_status_check.assert_called_once_with(sentinel.water_bath_port)
+
+    def test_checks_water_bath_inline_with_provided_gas_mixer_status(
+        self, mocker, mock_status_checks
+    ):
+        mocker.patch.object(module.gas_mixer, "assert_mixer_status_ok")
+        mock_submit = mocker.patch.object(module._status_check_executor, "submit")
+
+        module.check_status(MOCK_PORTS, gas_mixer_status=sentinel.gas_mixer_status)
+
+        mock_submit.assert_not_called()
+
     def test_status_error_logged_and_raised_with_contents(
         self, mock_logger, mock_status_checks
     ):
@@ -80,3 +105,29 @@ class TestCheckStatus:
 
         with pytest.raises(RecursionError):
             module.check_status(MOCK_PORTS)
+
+    def test_unexpected_water_bath_exception_still_raises(self, mock_status_checks):
+        mock_gas_mixer_status_check, mock_water_bath_status_check = mock_status_checks
+
+        mock_water_bath_status_check.side_effect = RecursionError
+
+        with pytest.raises(RecursionError):
+            module.check_status(MOCK_PORTS)
+
+    def test_waits_for_water_bath_check_when_gas_mixer_check_raises_unexpectedly(
+        self, mock_status_checks
+    ):
+        mock_gas_mixer_status_check, mock_water_bath_status_check = mock_status_checks
+        completed_checks = []
+
+        def slow_water_bath_check(*args):
+            time.sleep(0.05)
+            completed_checks.append("water bath")
+
+        mock_gas_mixer_status_check.side_effect = RecursionError
+        mock_water_bath_status_check.side_effect = slow_water_bath_check
+
+        with pytest.raises(RecursionError):
+            module.check_status(MOCK_PORTS)
+
+        assert completed_checks == ["water bath"]